@@ -1,18 +1,12 @@
 from schema import ClarifierOutput, State, ClarifierStateDiff
-from utils.utils import dict_to_aimessage, format_conversation
+from utils.utils import dict_to_aimessage, format_conversation, CONVERSATION_TOKEN_BUDGETS, prompt_date
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables import Runnable
 from langchain_core.language_models import LanguageModelInput
 from langchain_openai.chat_models.base import _DictOrPydantic
-from datetime import datetime
 
 
-def clarifier_agent(
-    llm_with_output: Runnable[LanguageModelInput, _DictOrPydantic],
-    state: State
-) -> dict:
-
-    system_message = f"""
+SYSTEM_PROMPT = """
 You are the CLARIFIER agent in a LangGraph-based multi-agent system.
 
 WHEN YOU ARE CALLED:
@@ -66,10 +60,10 @@ OUTPUT RULES:
 - The field `messages` represents updates to LangGraph state.messages.
 - If you include `messages`, it MUST be a LIST of message OBJECTS.
 - Each message object MUST have EXACTLY this structure:
-{{
+{
   "role": "assistant",
   "content": "<question>"
-}}
+}
 - If user_input_needed = true:
     - You MUST include `messages`
     - `messages` MUST be a list with EXACTLY ONE object
@@ -81,11 +75,14 @@ OUTPUT RULES:
     - You MUST NOT include `messages` at all
     - Do NOT output an empty list
     - Do NOT output null
-
-CURRENT CONTEXT:
-- Current date/time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 """
 
+
+async def clarifier_agent(
+    llm_with_output: Runnable[LanguageModelInput, _DictOrPydantic],
+    state: State
+) -> dict:
+
     last_user_message = next(
         (m for m in reversed(state.messages) if isinstance(m, HumanMessage)),
         None,
@@ -97,7 +94,7 @@ CURRENT CONTEXT:
 
     human_message = f"""
 [CONVERSATION HISTORY]
-{format_conversation(state.messages)}
+{format_conversation(state.messages, CONVERSATION_TOKEN_BUDGETS["clarifier"])}
 
 [LATEST USER MESSAGE]
 "{last_user_input}"
@@ -105,6 +102,7 @@ CURRENT CONTEXT:
 [SYSTEM STATE]
 - Side effects currently requested: {state.side_effects_requested}
 - Evaluator feedback: {state.feedback_on_work or "(none)"}
+- Current date: {prompt_date()}
 
 [TASK]
 1. Analyze user intent.
@@ -112,8 +110,8 @@ CURRENT CONTEXT:
 3. Decide if user input is needed.
 """
 
-    llm_response: ClarifierOutput  = llm_with_output.invoke([
-        SystemMessage(content=system_message),
+    llm_response: ClarifierOutput  = await llm_with_output.ainvoke([
+        SystemMessage(content=SYSTEM_PROMPT),
         HumanMessage(content=human_message)
     ])
 
@@ -3,20 +3,10 @@ from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.runnables import Runnable
 from langchain_core.language_models import LanguageModelInput
 from langchain_openai.chat_models.base import _DictOrPydantic
-from utils.utils import dict_to_aimessage, format_conversation
-from datetime import datetime
+from utils.utils import dict_to_aimessage, format_conversation, CONVERSATION_TOKEN_BUDGETS, prompt_date
 
 
-def evaluator_agent(
-    llm_with_output: Runnable[LanguageModelInput, _DictOrPydantic],
-    state: State
-) -> dict:
-
-    total_subtasks = len(state.subtasks or [])
-    tasks_remaining = state.next_subtask_index < total_subtasks
-    all_tasks_done = total_subtasks > 0 and not tasks_remaining
-
-    system_message = f"""
+SYSTEM_PROMPT = """
 Role:
 You are the EVALUATOR agent in a LangGraph-based multi-agent system.
 
@@ -80,13 +70,23 @@ Rules:
   - FALSE → Replanning would not help or user input is required.
 
 IMPORTANT:
-- If any subtasks remain, replan_needed MUST be FALSE.
+- If any subtasks remain, replan_needed MUST be FALSE, unless the user
+  refused the requested side effects and asked for something else instead
+  (e.g. "no, send it to Bob instead"): then replan_needed MUST be TRUE.
 - If user_input_needed is TRUE, replan_needed MUST be FALSE.
-
-Current date/time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 """
 
-    recent_context = format_conversation(state.messages[-3:]) or "(none)"
+
+async def evaluator_agent(
+    llm_with_output: Runnable[LanguageModelInput, _DictOrPydantic],
+    state: State
+) -> dict:
+
+    total_subtasks = len(state.subtasks or [])
+    tasks_remaining = state.next_subtask_index < total_subtasks
+    all_tasks_done = total_subtasks > 0 and not tasks_remaining
+
+    recent_context = format_conversation(state.messages, CONVERSATION_TOKEN_BUDGETS["evaluator"], tail=3) or "(none)"
 
     human_msg = f"""
 [EXECUTION STATUS]
@@ -106,10 +106,13 @@ All subtasks completed: {all_tasks_done}
 [SAFETY CONTEXT]
 Side effects requested: {state.side_effects_requested}
 User explicitly approved side effects: {state.user_side_effects_confirmed}
+
+[CURRENT CONTEXT]
+Current date: {prompt_date()}
 """
 
-    llm_response: EvaluatorOutput = llm_with_output.invoke([
-        SystemMessage(content=system_message),
+    llm_response: EvaluatorOutput = await llm_with_output.ainvoke([
+        SystemMessage(content=SYSTEM_PROMPT),
         HumanMessage(content=human_msg)
     ])
 
@@ -124,7 +127,7 @@ User explicitly approved side effects: {state.user_side_effects_confirmed}
 
     replan_needed = (
       llm_response.replan_needed
-      and all_tasks_done
+      and (all_tasks_done or approval_blocked)
       and not user_input_needed
     )
 
@@ -1,19 +1,15 @@
 from schema import State
-from langchain_core.messages import AIMessage, SystemMessage, HumanMessage, ToolMessage
-from utils.utils import CAPABILITIES_MANIFEST, EXECUTOR_TOOL_SAFETY, ToolSafety, infer_tool_calls
+from langchain_core.messages import AIMessage, SystemMessage, HumanMessage
+from utils.utils import CAPABILITIES_MANIFEST, EXECUTOR_TOOL_SAFETY, ToolSafety, infer_tool_calls, subtask_messages, prompt_date
 from langchain_core.runnables import Runnable
 from langchain_core.language_models import LanguageModelInput
 from langchain_core.messages import BaseMessage
-from datetime import datetime
 
 
-def executor_agent(
-    llm_with_tools: Runnable[LanguageModelInput, BaseMessage],
-    state: State
-) -> dict:
-    current = state.subtasks[state.next_subtask_index]
+APPROVAL_REQUEST = "Requesting approval for side-effectful actions using tools: "
 
-    system_msg = f"""
+
+SYSTEM_PROMPT = f"""
 Role:
 You are the EXECUTOR agent in a LangGraph-based multi-agent system.
 
@@ -39,7 +35,11 @@ TOOL USAGE GUIDELINES
   you MUST chain them in separate turns.
 - Do NOT call dependent tools in the same parallel batch.
 
-3. PYTHON_REPL USAGE
+3. STORED OUTPUTS
+- Long tool outputs (e.g. large files) are stored and replaced by a handle and a snippet.
+- Call `lookup` with a query (and the handle) to read the parts you need.
+
+4. PYTHON_REPL USAGE
 - You MUST explicitly print the final result.
 - Example (VALID): print(math.pi * 3)
 - Example (INVALID): math.pi * 3
@@ -48,24 +48,28 @@ TOOL USAGE GUIDELINES
 SAFETY & EXECUTION RULES
 --------------------------------------------------------------------
 
-4. SIDE EFFECT SAFETY
+5. SIDE EFFECT SAFETY
 - If you need to perform irreversible actions (write/delete files, send messages):
   - Just call the tools naturally.
   - The system has a built-in safety gate that will catch your request
     and ask the user for approval if needed.
   - Do NOT ask for permission in text; just call the tool.
 
-5. COMPLETION
+6. COMPLETION
 - When the task is complete, produce a concise summary.
 - The summary MUST be sufficient for evaluator verification.
-
---------------------------------------------------------------------
-CURRENT CONTEXT
---------------------------------------------------------------------
-- Current date and time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 """
 
+
+async def executor_agent(
+    llm_with_tools: Runnable[LanguageModelInput, BaseMessage],
+    state: State
+) -> dict:
+    current = state.subtasks[state.next_subtask_index]
+
     human_msg = f"""
+Current date: {prompt_date()}
+
 Current task:
 {current.task}
 """
@@ -77,15 +81,13 @@ Results (from previous agents):
 """
 
     messages = [
-        SystemMessage(content=system_msg),
+        SystemMessage(content=SYSTEM_PROMPT),
         HumanMessage(content=human_msg)
     ]
 
-    for msg in state.messages:
-        if isinstance(msg, (AIMessage, ToolMessage)):
-            messages.append(msg)
+    messages += subtask_messages(state)
 
-    llm_response = llm_with_tools.invoke(messages)
+    llm_response = await llm_with_tools.ainvoke(messages)
 
     if llm_response.tool_calls:
         tools = infer_tool_calls(llm_response)
@@ -108,12 +110,7 @@ Results (from previous agents):
             return {
                 "side_effects_requested": True,
                 "messages": [
-                    AIMessage(
-                        content=(
-                            f"Requesting approval for side-effectful actions using tools: "
-                            f"{', '.join(unique_unsafe_names)}"
-                        )
-                    )
+                    AIMessage(content=APPROVAL_REQUEST + ", ".join(unique_unsafe_names))
                 ]
             }
 
@@ -125,6 +122,7 @@ Results (from previous agents):
         "subtask_results": state.subtask_results + [llm_response.content],
         "messages": [AIMessage(content=f"Execution completed for task: {current.task}")],
         "next_subtask_index": state.next_subtask_index + 1,
+        "subtask_message_start": len(state.messages) + 1,
         "side_effects_requested": False,
         "side_effects_approved": False,
         "user_side_effects_confirmed": False
@@ -6,12 +6,7 @@ from langchain_openai.chat_models.base import _DictOrPydantic
 from utils.utils import dict_to_aimessage
 
 
-def finalizer_agent(
-    llm_with_output: Runnable[LanguageModelInput, _DictOrPydantic],
-    state: State
-) -> dict:
-
-    system_msg = f"""
+SYSTEM_PROMPT = """
 You are the FINALIZER agent in a multi-agent system.
 
 ROLE:
@@ -42,6 +37,12 @@ TONE:
 Clear, respectful, professional, human.
 """
 
+
+async def finalizer_agent(
+    llm_with_output: Runnable[LanguageModelInput, _DictOrPydantic],
+    state: State
+) -> dict:
+
     human_msg = f"""
 FINAL SYSTEM STATE (AUTHORITATIVE):
 
@@ -81,8 +82,8 @@ Generate the final message to the user based strictly on the state above.
 This is the FINAL message.
 """
 
-    llm_response: FinalizerOutput = llm_with_output.invoke([
-        SystemMessage(content=system_msg),
+    llm_response: FinalizerOutput = await llm_with_output.ainvoke([
+        SystemMessage(content=SYSTEM_PROMPT),
         HumanMessage(content=human_msg)
     ])
 
@@ -1,44 +1,17 @@
 from schema import State, PlannerOutput, PlannerStateDiff
-from utils.utils import dict_to_aimessage, format_conversation, CAPABILITIES_MANIFEST
+from utils.utils import dict_to_aimessage, format_conversation, CONVERSATION_TOKEN_BUDGETS, CAPABILITIES_MANIFEST, prompt_date
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.runnables import Runnable
 from langchain_core.language_models import LanguageModelInput
 from langchain_openai.chat_models.base import _DictOrPydantic
-from datetime import datetime
 from typing import Any
 import json
 
 
-def planner_agent(
-    llm_with_output: Runnable[LanguageModelInput, _DictOrPydantic],
-    state: State
-) -> dict:
-
-    replanning_context = ""
-    if state.replan_needed:
-      replanning_context = f"""
-****************************************************
-CRITICAL: REPLANNING MODE ACTIVATED
-****************************************************
-The previous execution FAILED. You are now correcting the plan.
-
-PREVIOUS FEEDBACK / ERROR:
-"{state.feedback_on_work}"
-
-REQUIREMENTS FOR THE NEW PLAN:
-1. Do NOT repeat the exact same steps that just failed.
-2. If a tool failed (e.g., file not found), add a diagnostic step first
-   (e.g., "List directory" to find the correct name).
-3. If a search failed, use DIFFERENT query terms.
-4. Your new subtasks MUST explicitly address the failure reason.
-"""
-
-    system_msg = f"""
+SYSTEM_PROMPT = f"""
 Role:
 You are the PLANNER agent in a LangGraph-based multi-agent system.
 
-{replanning_context}
-
 Your responsibility is to convert the conversation into an EXECUTABLE PLAN
 that downstream agents can carry out WITHOUT ambiguity, hidden assumptions,
 or reliance on implicit intermediate results.
@@ -57,7 +30,12 @@ SYSTEM MODEL (CRITICAL — YOU MUST FOLLOW)
 - Tool outputs are NOT structured unless explicitly extracted by an agent.
 
 2. EXECUTION MODEL
-- Subtasks are executed SEQUENTIALLY.
+- Subtasks are executed in list order, SEQUENTIALLY by default.
+- `depends_on` lists the indices of EARLIER subtasks a subtask needs:
+  - Omit it (null) to depend on every earlier subtask.
+  - Use [] when the subtask is fully independent.
+- Consecutive researcher subtasks whose dependencies are already complete
+  are executed CONCURRENTLY, each in isolation.
 - Each subtask MUST be executable in isolation using only:
   - The current State
   - The full message history
@@ -105,6 +83,14 @@ SUBTASK DESIGN RULES (STRICT)
     1. "Search for the current prices of BTC, ETH, and SOL."
   (The Researcher will run these 3 searches in parallel).
 
+- **Independent research threads:**
+  - When a request needs several DISTINCT research efforts, each requiring
+    its own browsing and extraction (e.g. comparing three products in depth),
+    emit them as separate researcher subtasks with depends_on = [].
+    They run concurrently.
+  - Any subtask that consumes their results (e.g. a summarizer) MUST list
+    their indices in depends_on (or omit depends_on).
+
 - **Merge preparation and execution:**
   - If an executor subtask involves sending a message or writing a file,
     the preparation of the payload MUST be included in the SAME subtask.
@@ -131,22 +117,48 @@ CURRENT CONTEXT
 - Read the full conversation.
 - Assume NO hidden state.
 - Assume NO prior structured data exists.
-- Current date/time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 
 --------------------------------------------------------------------
 BEGIN PLANNING
 --------------------------------------------------------------------
 """
 
-    human_msg = f"""
+
+async def planner_agent(
+    llm_with_output: Runnable[LanguageModelInput, _DictOrPydantic],
+    state: State
+) -> dict:
+
+    replanning_context = ""
+    if state.replan_needed:
+      replanning_context = f"""
+****************************************************
+CRITICAL: REPLANNING MODE ACTIVATED
+****************************************************
+The previous execution FAILED. You are now correcting the plan.
+
+PREVIOUS FEEDBACK / ERROR:
+"{state.feedback_on_work}"
+
+REQUIREMENTS FOR THE NEW PLAN:
+1. Do NOT repeat the exact same steps that just failed.
+2. If a tool failed (e.g., file not found), add a diagnostic step first
+   (e.g., "List directory" to find the correct name).
+3. If a search failed, use DIFFERENT query terms.
+4. Your new subtasks MUST explicitly address the failure reason.
+"""
+
+    human_msg = f"""{replanning_context}
+Current date: {prompt_date()}
+
 Conversation so far:
-{format_conversation(state.messages)}
+{format_conversation(state.messages, CONVERSATION_TOKEN_BUDGETS["planner"])}
 
 Generate the plan, subtasks, and success criteria.
 """
 
-    llm_response: PlannerOutput = llm_with_output.invoke([
-        SystemMessage(content=system_msg),
+    llm_response: PlannerOutput = await llm_with_output.ainvoke([
+        SystemMessage(content=SYSTEM_PROMPT),
         HumanMessage(content=human_msg)
     ])
 
@@ -160,10 +172,16 @@ Generate the plan, subtasks, and success criteria.
         "subtask_results": [],
         "replan_needed": False,
         "success_criteria_met": False,
-        "feedback_on_work": None
+        "feedback_on_work": None,
+        # A new plan asks for its own approval
+        "side_effects_requested": False,
+        "side_effects_approved": False,
+        "user_side_effects_confirmed": False
     }
 
     if diff.messages:
         updates["messages"] = [dict_to_aimessage(m) for m in diff.messages]
 
+    updates["subtask_message_start"] = len(state.messages) + len(updates.get("messages", []))
+
     return updates
@@ -1,31 +1,12 @@
-from schema import State
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
-from datetime import datetime
-from langchain_core.runnables import Runnable
+from schema import State, Subtask, SubtaskOutput
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable, RunnableConfig
 from langchain_core.language_models import LanguageModelInput
 from langchain_core.messages import BaseMessage
-from utils.utils import CAPABILITIES_MANIFEST
+from utils.utils import CAPABILITIES_MANIFEST, subtask_messages, prompt_date
 
 
-def researcher_agent(
-    llm_with_tools: Runnable[LanguageModelInput, BaseMessage],
-    state: State
-) -> dict:
-
-    if not state.subtasks:
-        raise RuntimeError("Researcher invoked with no subtasks")
-
-    if state.next_subtask_index >= len(state.subtasks):
-        raise RuntimeError("Researcher invoked with invalid task index")
-
-    current = state.subtasks[state.next_subtask_index]
-
-    if current.assigned_to != "researcher":
-        raise RuntimeError(
-            f"Researcher invoked for task assigned to {current.assigned_to}"
-        )
-
-    system_msg = f"""
+SYSTEM_PROMPT = f"""
 Role:
 You are the RESEARCHER agent in a LangGraph-based multi-agent system.
 
@@ -35,7 +16,8 @@ Tools:
 TOOL USAGE GUIDELINES:
 - **Parallel Execution:** You MAY call multiple tools in a single response if the tasks are independent (e.g., searching for 3 different topics).
 - **Sequential Dependencies:** If a tool depends on the outcome of another (e.g., you must `Maps_browser` BEFORE you can `extract_text`), you MUST chain them in separate turns. DO NOT call them in the same response.
-- **Page Context:** `extract_text`, `extract_hyperlinks`, and `get_elements` apply to the *active* browser page. Ensure you are on the correct page before calling them.
+- **Stored outputs:** Long tool outputs are stored and replaced by a handle and a snippet. Call `lookup` with a query (and the handle) to read the parts you need instead of fetching them again.
+- **Pages:** `navigate_browser` opens each URL in its own page and returns its handle (e.g. `p2`). Pass that handle as `page` to `extract_text`, `extract_hyperlinks`, `get_elements`, `click_element` and `previous_webpage`. To read several URLs, navigate to all of them in one response, then extract from each page in the next.
 
 Task:
 - Use your tools to fulfill the user's request.
@@ -43,10 +25,30 @@ Task:
 Rules:
 - When you are done, produce a concise summary.
 - Do NOT call tools after your final summary.
-- The current date and time is {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}.
 """
 
+
+def _current_subtask(state: State, index: int) -> Subtask:
+    if not state.subtasks:
+        raise RuntimeError("Researcher invoked with no subtasks")
+
+    if index >= len(state.subtasks):
+        raise RuntimeError("Researcher invoked with invalid task index")
+
+    current = state.subtasks[index]
+
+    if current.assigned_to != "researcher":
+        raise RuntimeError(
+            f"Researcher invoked for task assigned to {current.assigned_to}"
+        )
+
+    return current
+
+
+def _researcher_prompt(current: Subtask, state: State) -> list[BaseMessage]:
     human_msg = f"""
+Current date: {prompt_date()}
+
 Current task:
 {current.task}
 """
@@ -57,16 +59,24 @@ Results (from previous agents):
 {chr(10).join(f"- {r}" for r in state.subtask_results)}
 """
 
-    messages = [
-        SystemMessage(content=system_msg),
+    return [
+        SystemMessage(content=SYSTEM_PROMPT),
         HumanMessage(content=human_msg)
     ]
 
-    for msg in state.messages:
-        if isinstance(msg, (AIMessage, ToolMessage)):
-            messages.append(msg)
 
-    llm_response = llm_with_tools.invoke(messages)
+async def researcher_agent(
+    llm_with_tools: Runnable[LanguageModelInput, BaseMessage],
+    state: State
+) -> dict:
+
+    current = _current_subtask(state, state.next_subtask_index)
+
+    messages = _researcher_prompt(current, state)
+
+    messages += subtask_messages(state)
+
+    llm_response = await llm_with_tools.ainvoke(messages)
 
     if llm_response.tool_calls:
         return {
@@ -76,5 +86,49 @@ Results (from previous agents):
     return {
         "subtask_results": state.subtask_results + [llm_response.content],
         "messages": [AIMessage(content=f"Research completed for task: {current.task}")],
-        "next_subtask_index": state.next_subtask_index + 1
+        "next_subtask_index": state.next_subtask_index + 1,
+        "subtask_message_start": len(state.messages) + 1
+    }
+
+
+async def research_subtask_agent(
+    llm_with_tools: Runnable[LanguageModelInput, BaseMessage],
+    tool_node: Runnable,
+    state: State,
+    subtask_index: int,
+    config: RunnableConfig | None = None,
+    max_steps: int = 8
+) -> dict:
+    """
+    Runs the full researcher tool loop for ONE subtask in isolation, so several
+    independent subtasks can be fanned out concurrently. Only this subtask's own
+    tool calls are sent to the LLM; the result is reported as a SubtaskOutput
+    and merged in subtask order by the join step.
+    """
+    current = _current_subtask(state, subtask_index)
+    prompt = _researcher_prompt(current, state)
+    loop: list[BaseMessage] = []
+
+    try:
+        for _ in range(max_steps):
+            llm_response = await llm_with_tools.ainvoke(prompt + loop)
+            loop.append(llm_response)
+            if not llm_response.tool_calls:
+                break
+            tool_output = await tool_node.ainvoke({"messages": loop}, config)
+            loop += tool_output["messages"]
+        else:
+            raise RuntimeError(f"Research did not finish within {max_steps} steps")
+        result = loop.pop().content
+        status = f"Research completed for task: {current.task}"
+    except Exception as e:
+        result = f"Research failed for task: {current.task}. Error: {e}"
+        status = result
+        # Drop a dangling tool request so the history stays a valid call/response sequence
+        if loop and isinstance(loop[-1], AIMessage) and loop[-1].tool_calls:
+            loop.pop()
+
+    return {
+        "subtask_outputs": [SubtaskOutput(index=subtask_index, result=result)],
+        "messages": loop + [AIMessage(content=status)]
     }
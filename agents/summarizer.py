@@ -1,37 +1,148 @@
 from schema import State
-from utils.utils import dict_to_aimessage
+from utils.utils import dict_to_aimessage, estimate_tokens
 from langchain_core.messages import HumanMessage, SystemMessage
+import asyncio
 
 
-def summarizer_agent(llm, state: State) -> dict:
-
-    current = state.subtasks[state.next_subtask_index]
-
-    system_msg = f"""
+SYSTEM_PROMPT = """
 Role:
 You are the SUMMARIZER agent in a LangGraph-based multi-agent system.
 
 Task:
 - From the previous agents results, synthetize a report.
 
-Results (from previous agents):
-{chr(10).join(f"- {r}" for r in state.subtask_results)}
-
 Rules:
 - Capture the main points.
 - Do not introduce new information.
 - Do not include any additional commentary other than the report itself.
 """
 
-    human_msg = f"Task:\n{current.task}"
 
-    llm_response = llm.invoke([
-        SystemMessage(content=system_msg),
+MAP_PROMPT = """
+You are condensing research results for a report.
+
+From the results below, keep every point relevant to the task, with its
+figures, dates and sources. Drop everything else. Do not add information.
+Answer with the condensed points only.
+"""
+
+
+CLIPPED = " [...]"
+
+
+def split_results(items: list[str], chunk_tokens: int) -> list[str]:
+    """Packs result entries into groups of at most ~chunk_tokens, splitting oversized entries."""
+    chunk_chars = chunk_tokens * 4
+    pieces = [
+        item[i:i + chunk_chars]
+        for item in items
+        for i in range(0, max(len(item), 1), chunk_chars)
+    ]
+    groups, current, used = [], [], 0
+    for piece in pieces:
+        tokens = estimate_tokens(piece)
+        if current and used + tokens > chunk_tokens:
+            groups.append("\n".join(current))
+            current, used = [], 0
+        current.append(f"- {piece}")
+        used += tokens
+    if current:
+        groups.append("\n".join(current))
+    return groups
+
+
+def fit_results(items: list[str], max_tokens: int, min_chars: int = 200) -> list[str]:
+    """
+    Clips the longest entries to a common length so the whole fits in
+    ~max_tokens, each keeping its beginning. When that length would drop
+    under `min_chars`, the last entries are dropped instead.
+    """
+    if sum(estimate_tokens(item) for item in items) <= max_tokens:
+        return items
+    budget = max_tokens * 4
+    items = items[:max(budget // min_chars, 1)]
+    remaining = budget
+    lengths = sorted(len(item) for item in items)
+    for n, length in enumerate(lengths):
+        # Entries shorter than an even share of what is left stay whole
+        share = remaining // (len(lengths) - n)
+        if length > share:
+            cap = max(share - len(CLIPPED), 0)
+            return [item if len(item) <= share else item[:cap] + CLIPPED for item in items]
+        remaining -= length
+    return items
+
+
+async def _condense(llm, task: str, groups: list[str], max_concurrency: int) -> list[str]:
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def condense(group: str) -> str:
+        async with semaphore:
+            response = await llm.ainvoke([
+                SystemMessage(content=MAP_PROMPT),
+                HumanMessage(content=f"Task:\n{task}\n\nResults:\n{group}")
+            ])
+        return response.content
+
+    return list(await asyncio.gather(*(condense(group) for group in groups)))
+
+
+async def map_reduce(llm, task: str, items: list[str], chunk_tokens: int, max_concurrency: int = 8, max_rounds: int = 3) -> list[str]:
+    """
+    Condenses `items` until they fit in one chunk: each round splits them into
+    token-bounded groups and condenses the groups concurrently, so large inputs
+    are reduced hierarchically (groups of condensed groups). Stops early, with
+    the previous round's items, when a round doesn't shrink them.
+    """
+    tokens = sum(estimate_tokens(item) for item in items)
+    for _ in range(max_rounds):
+        if tokens <= chunk_tokens:
+            break
+        condensed = await _condense(llm, task, split_results(items, chunk_tokens), max_concurrency)
+        condensed_tokens = sum(estimate_tokens(item) for item in condensed)
+        if condensed_tokens >= tokens:
+            break
+        items, tokens = condensed, condensed_tokens
+    return items
+
+
+async def summarizer_agent(
+    llm,
+    state: State,
+    excerpts: str = "",
+    map_threshold: int = 8000,
+    chunk_tokens: int = 3000,
+    max_concurrency: int = 8
+) -> dict:
+
+    current = state.subtasks[state.next_subtask_index]
+
+    results = list(state.subtask_results)
+    if excerpts:
+        results.append(f"Source excerpts (from tool outputs gathered by previous agents):\n{excerpts}")
+
+    # Small inputs keep the single call; large ones are condensed map-reduce style first
+    if sum(estimate_tokens(r) for r in results) > map_threshold:
+        results = await map_reduce(llm, current.task, results, chunk_tokens, max_concurrency)
+        # Whatever the condensing rounds left must still fit the final prompt
+        results = fit_results(results, map_threshold)
+
+    human_msg = f"""
+Results (from previous agents):
+{chr(10).join(f"- {r}" for r in results)}
+
+Task:
+{current.task}
+"""
+
+    llm_response = await llm.ainvoke([
+        SystemMessage(content=SYSTEM_PROMPT),
         HumanMessage(content=human_msg)
     ])
 
     return {
         "subtask_results": state.subtask_results + [llm_response.content],
         "messages": [dict_to_aimessage(llm_response)],
-        "next_subtask_index": state.next_subtask_index + 1
+        "next_subtask_index": state.next_subtask_index + 1,
+        "subtask_message_start": len(state.messages) + 1
     }
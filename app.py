@@ -1,22 +1,32 @@
 from dotenv import load_dotenv
 load_dotenv(override=True)
 import gradio as gr
-from sidekick import Sidekick
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from pool import SidekickPool
+from utils.tracing import tracer, start_metrics_server
+from os import getenv
+import uvicorn
+import webbrowser
+
+
+pool = SidekickPool(
+    min_size=int(getenv("SIDEKICK_POOL_MIN", "2")),
+    max_size=int(getenv("SIDEKICK_POOL_MAX", "8")),
+    decay_after=int(getenv("SIDEKICK_POOL_DECAY_AFTER", "10")),
+)
+
+host = getenv("GRADIO_SERVER_NAME", "127.0.0.1")
+port = int(getenv("GRADIO_SERVER_PORT", "7860"))
 
 
 async def setup():
-    sidekick = Sidekick()
-    await sidekick.setup()
-    return sidekick
+    return await pool.acquire()
 
 async def process_message(sidekick, message, history):
-    history, _ = await sidekick.run_superstep(message, history)
-    return history, sidekick
-
-async def reset():
-    new_sidekick = Sidekick()
-    await new_sidekick.setup()
-    return "", None, new_sidekick
+    # Progress lines, then the answer token by token, then the final history
+    async for history, _ in sidekick.stream_superstep(message, history):
+        yield history, sidekick
 
 async def free_resources(sidekick):
     print("Cleaning up")
@@ -26,6 +36,11 @@ async def free_resources(sidekick):
     except Exception as e:
         print(f"Exception during cleanup: {e}")
 
+async def reset(sidekick):
+    await free_resources(sidekick)
+    new_sidekick = await pool.acquire()
+    return "", None, new_sidekick
+
 
 with gr.Blocks(title="Sidekick", theme=gr.themes.Default(primary_hue="emerald")) as ui:
     gr.Markdown("## Sidekick Personal Co-Worker")
@@ -51,7 +66,26 @@ with gr.Blocks(title="Sidekick", theme=gr.themes.Default(primary_hue="emerald"))
         [sidekick, message, chatbot],
         [chatbot, sidekick]
     )
-    reset_button.click(reset, [], [message, chatbot, sidekick])
+    reset_button.click(reset, [sidekick], [message, chatbot, sidekick])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warmed on the loop that serves the UI, before the first visitor arrives
+    await pool.start()
+    webbrowser.open(f"http://{host}:{port}")
+    yield
+    print("Shutting down")
+    await pool.shutdown()
+
 
+app = gr.mount_gradio_app(FastAPI(lifespan=lifespan), ui, path="/")
 
-ui.launch(inbrowser=True)
+# Prometheus /metrics and OTLP/JSON /traces next to the UI; METRICS_PORT=0 disables it
+metrics_port = int(getenv("METRICS_PORT", "9464"))
+metrics_server = start_metrics_server(tracer, metrics_port) if metrics_port else None
+try:
+    uvicorn.run(app, host=host, port=port)
+finally:
+    if metrics_server:
+        metrics_server.shutdown()
@@ -0,0 +1,91 @@
+"""
+Throughput of concurrent sessions with the agent nodes as coroutines against
+the same nodes as sync functions, as they were before.
+
+Each session runs the nodes of a research request (clarifier, planner,
+researcher, evaluator, finalizer) through a StateGraph on one event loop;
+every node makes one model call of `--llm-latency` seconds. LangGraph runs
+sync nodes on the loop's default thread pool, where each call holds a worker
+thread until the model answers, so sessions queue on the pool size; async
+nodes await the model on the loop itself.
+
+    python -m benchmarks.async_nodes --sessions 1 8 32 --llm-latency 0.5
+"""
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import StateGraph, START, END
+from schema import State
+import argparse
+import asyncio
+import statistics
+import time
+
+
+NODES = ["clarifier", "planner", "researcher", "evaluator", "finalizer"]
+
+
+class SlowModel:
+    """Stands in for ChatOpenAI: `invoke` blocks its thread for the model's latency, `ainvoke` yields to the loop."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def invoke(self, messages) -> AIMessage:
+        time.sleep(self.latency)
+        return AIMessage(content="ok")
+
+    async def ainvoke(self, messages) -> AIMessage:
+        await asyncio.sleep(self.latency)
+        return AIMessage(content="ok")
+
+
+def build_graph(model: SlowModel, sync_nodes: bool):
+    def sync_node(state: State) -> dict:
+        return {"messages": [model.invoke(state.messages)]}
+
+    async def async_node(state: State) -> dict:
+        return {"messages": [await model.ainvoke(state.messages)]}
+
+    graph_builder = StateGraph(State)
+    for name in NODES:
+        graph_builder.add_node(name, sync_node if sync_nodes else async_node)
+    graph_builder.add_edge(START, NODES[0])
+    for current, following in zip(NODES, NODES[1:]):
+        graph_builder.add_edge(current, following)
+    graph_builder.add_edge(NODES[-1], END)
+    return graph_builder.compile()
+
+
+async def run(sessions: int, llm_latency: float, sync_nodes: bool) -> dict:
+    graph = build_graph(SlowModel(llm_latency), sync_nodes)
+    latencies = []
+
+    async def session(i: int):
+        start = time.perf_counter()
+        await graph.ainvoke({"messages": [HumanMessage(content=f"Research request {i}")]})
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+    return {
+        "rps": sessions / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per model call")
+    args = parser.parse_args()
+
+    print(f"{'sessions':>8} {'nodes':>6} {'rps':>7} {'p50_ms':>8} {'max_ms':>8}")
+    for sessions in args.sessions:
+        for mode, sync_nodes in (("sync", True), ("async", False)):
+            report = await run(sessions, args.llm_latency, sync_nodes)
+            print(f"{sessions:>8} {mode:>6} {report['rps']:>7.2f} {report['p50_ms']:>8.0f} {report['max_ms']:>8.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+Load test for the checkpoint backend: N concurrent sessions each run a series
+of super-steps (read latest checkpoint, put task writes, put checkpoint) and
+the script reports checkpoint write throughput as the session count grows.
+
+Compares the plain SQLite saver with the write-behind cache in front of it,
+which batches the writes of concurrent sessions into one transaction.
+
+    python -m benchmarks.checkpoint_load --sessions 1 4 16 --steps 30
+"""
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver, empty_checkpoint
+from db.checkpoint_cache import CachedCheckpointSaver
+from db.sql_memory import setup_memory
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+
+async def session(checkpointer: BaseCheckpointSaver, steps: int):
+    thread_id = str(uuid.uuid4())
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    messages = [HumanMessage(content="Find the latest figures and summarize them.")]
+    for step in range(steps):
+        await checkpointer.aget_tuple({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}})
+        message = AIMessage(content=f"Step {step}: " + "intermediate findings with sources. " * 20)
+        messages = messages + [message]
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = {"messages": messages, "next_subtask_index": step}
+        if "checkpoint_id" in config["configurable"]:
+            await checkpointer.aput_writes(config, [("messages", [message])], str(uuid.uuid4()))
+        config = await checkpointer.aput(config, checkpoint, {"step": step}, {})
+    if isinstance(checkpointer, CachedCheckpointSaver):
+        await checkpointer.flush()
+
+
+async def run(sessions: int, steps: int, cached: bool) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        saver = await setup_memory(os.path.join(tmp, "memory.db"))
+        await saver.setup()
+        checkpointer = CachedCheckpointSaver(saver) if cached else saver
+
+        start = time.perf_counter()
+        await asyncio.gather(*(session(checkpointer, steps) for _ in range(sessions)))
+        elapsed = time.perf_counter() - start
+
+        if isinstance(checkpointer, CachedCheckpointSaver):
+            await checkpointer.close()
+        await saver.conn.close()
+    return sessions * steps / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--steps", type=int, default=30)
+    args = parser.parse_args()
+
+    layouts = {"saver": False, "saver + cache": True}
+    print(f"{'sessions':>8} " + " ".join(f"{name:>18}" for name in layouts) + "   (checkpoints/s)")
+    for sessions in args.sessions:
+        rates = [await run(sessions, args.steps, cached) for cached in layouts.values()]
+        print(f"{sessions:>8} " + " ".join(f"{rate:>18.0f}" for rate in rates))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
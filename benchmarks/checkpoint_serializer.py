@@ -0,0 +1,111 @@
+"""
+Compares checkpoint bytes written and read latency per super-step for the
+default JsonPlus serializer and CompressedSerializer.
+
+Replays a synthetic thread in which every step appends messages and subtask
+results to the State, the same way the agents do, so blob sizes grow with the
+thread like they do in production.
+
+    python -m benchmarks.checkpoint_serializer --steps 60
+"""
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from db.serializer import CompressedSerializer
+from schema import Subtask
+import aiosqlite
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+
+def synthetic_step(step: int) -> list:
+    call_id = f"call_{uuid.uuid4().hex[:24]}"
+    return [
+        AIMessage(
+            content="",
+            tool_calls=[{"name": "search", "args": {"query": f"topic {step} latest figures"}, "id": call_id}],
+            response_metadata={"model_name": "gpt-4o-mini", "finish_reason": "tool_calls"},
+            usage_metadata={"input_tokens": 1200 + step * 40, "output_tokens": 30, "total_tokens": 1230 + step * 40},
+        ),
+        ToolMessage(
+            content=" ".join(f"Result {i} for topic {step}: snippet text with numbers {i * step}." for i in range(12)),
+            tool_call_id=call_id,
+        ),
+        AIMessage(content=f"Findings for step {step}: " + "the sources agree on the main points. " * 6),
+    ]
+
+
+async def run(serde, steps: int, reads: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "memory.db")
+        async with aiosqlite.connect(db_path) as conn:
+            saver = AsyncSqliteSaver(conn, serde=serde)
+            await saver.setup()
+            config = {"configurable": {"thread_id": "bench", "checkpoint_ns": ""}}
+            messages = [HumanMessage(content="Research the topic and write a report with sources.")]
+            results: list[str] = []
+            subtasks = [Subtask(task=f"Research part {i} of the topic", assigned_to="researcher", depends_on=[]) for i in range(steps)]
+            written, write_times, read_times = [], [], []
+
+            for step in range(steps):
+                messages = messages + synthetic_step(step)
+                results = results + [messages[-1].content]
+                checkpoint = empty_checkpoint()
+                checkpoint["channel_values"] = {
+                    "messages": messages,
+                    "subtasks": subtasks,
+                    "subtask_results": results,
+                    "next_subtask_index": step + 1,
+                }
+                written.append(len(saver.serde.dumps_typed(checkpoint)[1]))
+
+                start = time.perf_counter()
+                config = await saver.aput(config, checkpoint, {"step": step}, {})
+                write_times.append(time.perf_counter() - start)
+
+                for _ in range(reads):
+                    start = time.perf_counter()
+                    await saver.aget_tuple({"configurable": {"thread_id": "bench", "checkpoint_ns": ""}})
+                    read_times.append(time.perf_counter() - start)
+
+            await conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+            db_bytes = os.path.getsize(db_path)
+
+    return {
+        "bytes_total": sum(written),
+        "bytes_per_step": round(sum(written) / steps),
+        "bytes_last_step": written[-1],
+        "db_bytes": db_bytes,
+        "write_ms_p50": round(statistics.median(write_times) * 1000, 3),
+        "read_ms_p50": round(statistics.median(read_times) * 1000, 3),
+        "read_ms_p99": round(statistics.quantiles(read_times, n=100)[98] * 1000, 3),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=60)
+    parser.add_argument("--reads", type=int, default=5, help="latest-checkpoint reads per step")
+    args = parser.parse_args()
+
+    serializers = {
+        "jsonplus": JsonPlusSerializer(),
+        "zlib-1": CompressedSerializer(level=1),
+        "zlib-6": CompressedSerializer(level=6),
+    }
+    baseline = None
+    for name, serde in serializers.items():
+        report = await run(serde, args.steps, args.reads)
+        baseline = baseline or report
+        ratio = report["bytes_total"] / baseline["bytes_total"]
+        print(f"{name:>9}: " + ", ".join(f"{k}={v}" for k, v in report.items()) + f", size_ratio={ratio:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,156 @@
+"""
+Offline stand-ins for the OpenAI chat model and the Sidekick tools.
+
+ScriptedChatModel is a real BaseChatModel, so `bind_tools` and
+`with_structured_output` go through LangChain's normal tool-calling and
+parsing paths, and callbacks (tracing, recording) fire as they do in production.
+"""
+from typing import Any, AsyncIterator, Callable, Optional
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field, create_model
+from utils.utils import estimate_tokens
+import asyncio
+import json
+import time
+import uuid
+
+
+# (messages, names of the bound tools or structured-output schema, run metadata) -> reply
+Responder = Callable[[list[BaseMessage], list[str], dict[str, Any]], AIMessage]
+
+
+def tool_call(name: str, **args) -> dict:
+    return {"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:24]}"}
+
+
+class ScriptedChatModel(BaseChatModel):
+    respond: Responder
+    latency: float = 0.0
+    # Optional size-dependent latency, in seconds per 1k prompt tokens and per output token
+    prompt_latency: float = 0.0
+    token_latency: float = 0.0
+    chunk_size: int = 16
+    model_name: str = "gpt-4o-mini"
+    calls: int = 0
+    # (thread id, agent, prompt tokens) of every call
+    prompts: list[tuple[str, str, int]] = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: list, *, tool_choice: Optional[Any] = None, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _reply(self, messages: list[BaseMessage], tools: Optional[list[dict]], run_manager: Any) -> ChatResult:
+        self.calls += 1
+        metadata = getattr(run_manager, "metadata", None) or {}
+        message = self.respond(messages, [t["function"]["name"] for t in tools or []], metadata)
+        input_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        self.prompts.append((metadata.get("thread_id", ""), metadata.get("agent", ""), input_tokens))
+        output_tokens = estimate_tokens(str(message.content) + str(message.tool_calls))
+        message.usage_metadata = {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+        message.response_metadata = {"model_name": self.model_name, "finish_reason": "tool_calls" if message.tool_calls else "stop"}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _delay(self, result: ChatResult) -> float:
+        usage = result.generations[0].message.usage_metadata
+        return self.latency + usage["input_tokens"] / 1000 * self.prompt_latency + usage["output_tokens"] * self.token_latency
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        tools: Optional[list[dict]] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        result = self._reply(messages, tools, run_manager)
+        time.sleep(self._delay(result))
+        return result
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        tools: Optional[list[dict]] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        result = self._reply(messages, tools, run_manager)
+        await asyncio.sleep(self._delay(result))
+        return result
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        tools: Optional[list[dict]] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        # Used when a streaming callback is attached; `latency` is the time to the
+        # first chunk, the rest of the reply follows as fast as it is consumed
+        await asyncio.sleep(self.latency)
+        message = self._reply(messages, tools, run_manager).generations[0].message
+        content = str(message.content)
+        for i in range(0, len(content), self.chunk_size):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=content[i:i + self.chunk_size]))
+            await asyncio.sleep(0)
+        for index, call in enumerate(message.tool_calls):
+            args = json.dumps(call["args"])
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": "", "id": call["id"], "index": index}
+            ]))
+            for i in range(0, len(args), self.chunk_size):
+                yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                    {"name": None, "args": args[i:i + self.chunk_size], "id": None, "index": index}
+                ]))
+                await asyncio.sleep(0)
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content="",
+            usage_metadata=message.usage_metadata,
+            response_metadata=message.response_metadata
+        ))
+
+
+def stub_tool(name: str, description: str, args: list[str], latency: float, output: Callable[[dict], str]) -> StructuredTool:
+    schema = create_model(f"{name}_input", **{arg: (str, Field(description=arg)) for arg in args})
+
+    async def run(**kwargs) -> str:
+        await asyncio.sleep(latency)
+        return output(kwargs)
+
+    return StructuredTool.from_function(coroutine=run, name=name, description=description, args_schema=schema)
+
+
+def _page(kwargs: dict, paragraphs: int = 40) -> str:
+    topic = next(iter(kwargs.values()), "page")
+    return " ".join(f"Paragraph {i} about {topic}: figures, dates and sources for the report." for i in range(paragraphs))
+
+
+def stub_tools(latency: float = 0.0, browser_latency: Optional[float] = None, page_paragraphs: int = 40) -> tuple[list, list]:
+    """Researcher and executor tools with the production names and latency instead of I/O."""
+    page = lambda a: _page(a, page_paragraphs)
+    browser_latency = latency if browser_latency is None else browser_latency
+    researcher_tools = [
+        stub_tool("search", "Web search", ["query"], latency, lambda a: f"Top results for {a['query']}: " + "; ".join(f"result {i} https://example.com/{i}" for i in range(8))),
+        stub_tool("wikipedia", "Wikipedia lookup", ["query"], latency, page),
+        stub_tool("navigate_browser", "Navigate the browser to a URL", ["url"], browser_latency, lambda a: f"Navigating to {a['url']} returned status code 200"),
+        stub_tool("extract_text", "Extract the text of the current page", [], browser_latency, page),
+        stub_tool("extract_hyperlinks", "Extract the links of the current page", [], browser_latency, lambda a: str([f"https://example.com/{i}" for i in range(20)])),
+        stub_tool("current_webpage", "URL of the current page", [], browser_latency, lambda a: "https://example.com/"),
+    ]
+    executor_tools = [
+        stub_tool("read_file", "Read a file", ["file_path"], latency, page),
+        stub_tool("list_directory", "List a directory", ["dir_path"], latency, lambda a: "report.md\nnotes.txt\ndata.csv"),
+        stub_tool("write_file", "Write a file", ["file_path", "text"], latency, lambda a: f"File written successfully to {a['file_path']}."),
+        stub_tool("Python_REPL", "Run Python code", ["query"], latency, lambda a: "42\n"),
+        stub_tool("send_whatsapp", "Send a WhatsApp message", ["text"], latency, lambda a: "SM0000"),
+    ]
+    return researcher_tools, executor_tools
@@ -0,0 +1,225 @@
+"""
+Checks that the rule-based fast paths (utils/fast_paths.py) take the same
+routing decisions as the LLM agents they stand in for, and reports how many
+LLM calls they save.
+
+Each rule is first checked on its own: a state goes in, and the rule that
+fires and the update it returns must be the expected ones, including states
+that must be left to the LLM (replies that are not a bare yes/no, approvals
+given before the latest request, plans with subtasks left). Then every
+harness scenario runs twice on the real graph with the scripted model, with
+fast paths off and on; the sequence of nodes of each turn must be the same,
+and must pass the scenario's route check when it has one. Exits with status
+1 on any difference or failed check.
+
+    python -m benchmarks.fast_paths
+    python -m benchmarks.fast_paths --scenario approve_side_effect decline_side_effect
+"""
+from typing import Optional
+from sidekick import Sidekick, SidekickRuntime
+from agents.executor import APPROVAL_REQUEST
+from schema import State, Subtask
+from utils.fast_paths import APPROVAL_FEEDBACK, FastPaths, fast_paths
+from tools.index import output_index
+from benchmarks.fakes import ScriptedChatModel, stub_tools
+from benchmarks.harness import SCENARIOS, Scenario
+from langchain_core.messages import AIMessage, HumanMessage
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+
+SEND = [Subtask(task="Send the report link on WhatsApp", assigned_to="executor", requires_side_effects=True)]
+SUMMARY = [Subtask(task="Summarize the findings", assigned_to="summarizer")]
+ASKED = AIMessage(content=APPROVAL_REQUEST + "send_whatsapp")
+PENDING = {"subtasks": SEND, "side_effects_requested": True}
+
+
+class RuleCase:
+    """A state, the rule expected to decide it (None: left to the LLM) and the fields its update must set."""
+
+    def __init__(self, name: str, node: str, state: State, rule: Optional[str], updates: Optional[dict] = None, says: str = ""):
+        self.name = name
+        self.node = node
+        self.state = state
+        self.rule = rule
+        self.updates = updates or {}
+        self.says = says
+
+    def problem(self) -> Optional[str]:
+        rules = FastPaths()
+        update = rules.decide(self.node, self.state)
+        taken = next(iter(rules.stats())).split(".", 1)[1]
+        expected = self.rule or "llm"
+        if taken != expected:
+            return f"decided by {taken}, expected {expected}"
+        if update is None:
+            return None
+        wrong = {k: update.get(k) for k, v in self.updates.items() if update.get(k) != v}
+        if wrong:
+            return f"update has {wrong}, expected {self.updates}"
+        message = str(update["messages"][-1].content) if update.get("messages") else ""
+        if self.says not in message:
+            return f"message {message!r} does not say {self.says!r}"
+        return None
+
+
+RULE_CASES = [
+    RuleCase(
+        "bare_yes", "clarifier",
+        State(messages=[ASKED, HumanMessage(content="Yes, go ahead!")], **PENDING),
+        "consent_reply", {"user_input_needed": False, "user_side_effects_confirmed": True},
+    ),
+    RuleCase(
+        "bare_no", "clarifier",
+        State(messages=[ASKED, HumanMessage(content="No, don't.")], **PENDING),
+        "consent_reply", {"user_input_needed": False, "user_side_effects_confirmed": False},
+    ),
+    RuleCase(
+        "yes_with_changes", "clarifier",
+        State(messages=[ASKED, HumanMessage(content="Yes, but send it to Bob instead")], **PENDING),
+        None,
+    ),
+    RuleCase(
+        "yes_nothing_pending", "clarifier",
+        State(messages=[HumanMessage(content="yes")], subtasks=SEND),
+        None,
+    ),
+    RuleCase(
+        "ask_approval", "clarifier",
+        State(messages=[ASKED, AIMessage(content=APPROVAL_FEEDBACK + "send_whatsapp")], user_input_needed=True, **PENDING),
+        "approval_question", {"user_input_needed": True}, says="Send the report link on WhatsApp",
+    ),
+    RuleCase(
+        "approval_requested", "evaluator",
+        State(messages=[HumanMessage(content="Send me the link"), ASKED], **PENDING),
+        "approval_required", {"user_input_needed": True, "side_effects_approved": False}, says=APPROVAL_FEEDBACK,
+    ),
+    RuleCase(
+        "approval_given", "evaluator",
+        State(messages=[ASKED, HumanMessage(content="yes")], user_side_effects_confirmed=True, **PENDING),
+        "approval_granted", {"side_effects_approved": True, "user_input_needed": False},
+    ),
+    RuleCase(
+        "approval_for_older_request", "evaluator",
+        State(
+            messages=[ASKED, HumanMessage(content="yes"), AIMessage(content=APPROVAL_REQUEST + "write_file")],
+            **PENDING
+        ),
+        "approval_required", {"user_input_needed": True, "side_effects_approved": False}, says="write_file",
+    ),
+    RuleCase(
+        "older_approval_no_new_reply", "clarifier",
+        State(messages=[ASKED, HumanMessage(content="yes"), AIMessage(content=APPROVAL_REQUEST + "write_file")], **PENDING),
+        None,
+    ),
+    RuleCase(
+        "approval_refused", "evaluator",
+        State(messages=[ASKED, HumanMessage(content="no thanks")], **PENDING),
+        "approval_declined", {"side_effects_approved": False, "success_criteria_met": False},
+    ),
+    RuleCase(
+        "refusal_answer", "finalizer",
+        State(messages=[ASKED, HumanMessage(content="no thanks")], **PENDING),
+        "declined", says="won't go ahead",
+    ),
+    RuleCase(
+        "refusal_with_changes", "finalizer",
+        State(messages=[ASKED, HumanMessage(content="No, send it to Bob instead")], **PENDING),
+        None,
+    ),
+    RuleCase(
+        "summary_done", "evaluator",
+        State(subtasks=SUMMARY, next_subtask_index=1, subtask_results=["Prices fell 20%."]),
+        "single_summary", {"success_criteria_met": True},
+    ),
+    RuleCase(
+        "summary_answer", "finalizer",
+        State(subtasks=SUMMARY, next_subtask_index=1, subtask_results=["Prices fell 20%."], success_criteria_met=True),
+        "summary_answer", {"final_answer": "Prices fell 20%."},
+    ),
+    RuleCase(
+        "summary_with_subtasks_left", "evaluator",
+        State(subtasks=SUMMARY + SEND, next_subtask_index=1, subtask_results=["Prices fell 20%."]),
+        None,
+    ),
+    RuleCase(
+        "empty_summary", "evaluator",
+        State(subtasks=SUMMARY, next_subtask_index=1, subtask_results=[" "]),
+        None,
+    ),
+]
+
+
+def check_rules() -> int:
+    """Prints the rule cases that fail; returns their number."""
+    failures = 0
+    for case in RULE_CASES:
+        problem = case.problem()
+        if problem:
+            failures += 1
+            print(f"{case.node + '.' + case.name:>40}  FAILED: {problem}")
+    print(f"# rule checks: {len(RULE_CASES) - failures}/{len(RULE_CASES)} passed\n")
+    return failures
+
+
+async def routes(scenario: Scenario) -> tuple[list[list[str]], int]:
+    """Nodes run in each turn of the scenario, and the number of LLM calls."""
+    with tempfile.TemporaryDirectory() as tmp:
+        output_index.close()
+        index_path, output_index.db_path = output_index.db_path, os.path.join(tmp, "tool_index.db")
+        model = ScriptedChatModel(respond=scenario.respond)
+        runtime = SidekickRuntime(db_path=os.path.join(tmp, "memory.db"))
+        await runtime.setup(llm=model)
+        sidekick = Sidekick()
+        sidekick.bind(runtime, *stub_tools())
+        turns = []
+        try:
+            for turn in scenario.turns:
+                nodes = []
+                async for update in sidekick.graph.astream(
+                    {"messages": [HumanMessage(content=turn)]}, config=sidekick.config(), stream_mode="updates"
+                ):
+                    nodes += [name for name in update if not name.startswith("__")]
+                turns.append(nodes)
+        finally:
+            await runtime.shutdown()
+            output_index.db_path = index_path
+        return turns, model.calls
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), nargs="+", default=list(SCENARIOS))
+    args = parser.parse_args()
+
+    enabled = fast_paths.enabled
+    failures = check_rules()
+    print(f"{'scenario':>22} {'routes':>8} {'llm_calls':>10} {'fast_calls':>11}  fast paths taken")
+    for name in args.scenario:
+        fast_paths.enabled = set()
+        llm_routes, llm_calls = await routes(SCENARIOS[name])
+        fast_paths.enabled = enabled
+        fast_paths.reset()
+        fast_routes, fast_calls = await routes(SCENARIOS[name])
+        taken = {k: v for k, v in fast_paths.stats().items() if not k.endswith(".llm")}
+
+        same = llm_routes == fast_routes
+        route_check = SCENARIOS[name].route_check
+        problems = [p for p in (route_check(llm_routes), route_check(fast_routes)) if p] if route_check else []
+        failures += (not same) + bool(problems)
+        print(f"{name:>22} {'same' if same else 'DIFFER':>8} {llm_calls:>10} {fast_calls:>11}  {taken or '-'}")
+        for problem in dict.fromkeys(problems):
+            print(f"{'':>22} check failed: {problem}")
+        if not same:
+            for i, (a, b) in enumerate(zip(llm_routes, fast_routes)):
+                if a != b:
+                    print(f"{'':>22} turn {i + 1}\n{'':>24}llm:  {' > '.join(a)}\n{'':>24}fast: {' > '.join(b)}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,436 @@
+"""
+Offline benchmark of the full Sidekick graph.
+
+Builds the real runtime and graph (checkpointer, routers, tool nodes, caches)
+around a scripted chat model and stub tools with configurable latency, runs
+representative request shapes with N concurrent sessions, and reports
+throughput, p50/p99 request latency, LLM calls, checkpoint bytes and peak RSS.
+
+    python -m benchmarks.harness --sessions 1 8 --requests 3
+    python -m benchmarks.harness --scenario parallel_research --llm-latency 0.5
+    python -m benchmarks.harness --stream        # adds time to first update / answer token
+"""
+from typing import Callable, Optional
+from langchain_core.messages import AIMessage, BaseMessage
+from schema import Subtask
+from agents.executor import APPROVAL_REQUEST
+from sidekick import Sidekick, SidekickRuntime
+from tools.index import output_index
+from benchmarks.fakes import ScriptedChatModel, stub_tools, tool_call
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+
+CLARIFYING_QUESTION = "Which period should the report cover?"
+
+RESEARCH_ROUNDS = [
+    [("search", {"query": "market size 2025"}), ("search", {"query": "market growth forecast"})],
+    [("navigate_browser", {"url": "https://example.com/report"})],
+    [("extract_text", {})],
+]
+
+EXECUTE_ROUNDS = [
+    [("read_file", {"file_path": "data.csv"})],
+    [("Python_REPL", {"query": "print(6 * 7)"})],
+]
+
+LONG_PAGE_ROUNDS = [
+    [("wikipedia", {"query": "home battery"})],
+    [("navigate_browser", {"url": "https://example.com/report"})],
+    [("extract_text", {})],
+]
+
+SEND_ROUNDS = [
+    [("send_whatsapp", {"text": "The market report is ready."})],
+]
+
+APPROVAL_QUESTION = "May I send the WhatsApp message?"
+
+
+class Scenario:
+    """A request shape: the plan the scripted planner returns and the tool rounds each agent makes."""
+
+    def __init__(
+        self,
+        name: str,
+        subtasks: list[Subtask],
+        turns: list[str],
+        clarify: bool = False,
+        research_rounds: list = RESEARCH_ROUNDS,
+        execute_rounds: list = EXECUTE_ROUNDS,
+        approve: Optional[bool] = None,
+        redirect: bool = False,
+        page_paragraphs: int = 40,
+        check: Optional[Callable[[dict], Optional[str]]] = None,
+        track_prompt_growth: bool = False,
+        route_check: Optional[Callable[[list[list[str]]], Optional[str]]] = None
+    ):
+        self.name = name
+        self.subtasks = subtasks
+        self.turns = turns
+        self.clarify = clarify
+        self.research_rounds = research_rounds
+        self.execute_rounds = execute_rounds
+        # Whether the last turn approves (True) or declines (False) the side effects requested in the first
+        self.approve = approve
+        # Whether the declining turn asks for something else instead
+        self.redirect = redirect
+        # Size of the stub pages (~75 chars per paragraph)
+        self.page_paragraphs = page_paragraphs
+        # Return what is wrong with the scenario's report / with the nodes run in each turn, or None
+        self.check = check
+        self.route_check = route_check
+        # Every turn has the same shape, so subtask agents' prompts can be compared across turns
+        self.track_prompt_growth = track_prompt_growth
+
+    @staticmethod
+    def _tool_rounds(messages: list[BaseMessage], rounds: list, summary: str) -> AIMessage:
+        done = sum(1 for m in messages if isinstance(m, AIMessage) and m.tool_calls)
+        if done < len(rounds):
+            return AIMessage(content="", tool_calls=[tool_call(name, **args) for name, args in rounds[done]])
+        return AIMessage(content=summary)
+
+    def respond(self, messages: list[BaseMessage], names: list[str], metadata: dict) -> AIMessage:
+        prompt = str(messages[-1].content)
+        opening = f'[LATEST USER MESSAGE]\n"{self.turns[0]}"' in prompt
+        if "ClarifierOutput" in names and "Side effects currently requested: True" in prompt:
+            # Read the consent from the scenario's consent turn when it answers the latest approval request, else ask
+            history = prompt.split("[LATEST USER MESSAGE]")[0]
+            answers = f'[LATEST USER MESSAGE]\n"{self.turns[-1]}"' in prompt and history.rfind(APPROVAL_REQUEST) < history.rfind("User: ")
+            diff = (
+                {"user_input_needed": False, "user_side_effects_confirmed": bool(self.approve)}
+                if answers
+                else {"messages": [{"role": "assistant", "content": APPROVAL_QUESTION}], "user_input_needed": True}
+            )
+            return AIMessage(content="", tool_calls=[tool_call("ClarifierOutput", state_diff=diff)])
+        if "ClarifierOutput" in names:
+            # Ask only when the latest user message is the opening turn
+            ask = self.clarify and opening
+            diff = (
+                {"messages": [{"role": "assistant", "content": CLARIFYING_QUESTION}], "user_input_needed": True}
+                if ask
+                else {"user_input_needed": False}
+            )
+            return AIMessage(content="", tool_calls=[tool_call("ClarifierOutput", state_diff=diff)])
+        if "PlannerOutput" in names:
+            return AIMessage(content="", tool_calls=[tool_call("PlannerOutput", state_diff={
+                "plan": f"Plan for {self.name}",
+                "subtasks": [s.model_dump() for s in self.subtasks],
+                "success_criteria": "A sourced report is available in the results.",
+            })])
+        if "EvaluatorOutput" in names and "Side effects requested: True" in prompt:
+            approved = "User explicitly approved side effects: True" in prompt
+            # The refusal only answers the approval request made before it
+            declined = self.approve is False and prompt.rfind(f"User: {self.turns[-1]}") > prompt.rfind(APPROVAL_REQUEST)
+            return AIMessage(content="", tool_calls=[tool_call(
+                "EvaluatorOutput",
+                feedback="Approved by the user." if approved else "The user declined." if declined else "Approval is required.",
+                success_criteria_met=False,
+                user_input_needed=not approved and not declined,
+                # A refusal that asks for something else is replanned
+                replan_needed=declined and self.redirect,
+                side_effects_approved=approved,
+            )])
+        if "EvaluatorOutput" in names:
+            return AIMessage(content="", tool_calls=[tool_call(
+                "EvaluatorOutput",
+                feedback="All subtasks completed with sourced results.",
+                success_criteria_met=True,
+                user_input_needed=False,
+                replan_needed=False,
+            )])
+        if "FinalizerOutput" in names:
+            return AIMessage(content="", tool_calls=[tool_call("FinalizerOutput", final_answer="Here is the report. " * 20)])
+        if "search" in names:
+            return self._tool_rounds(messages, self.research_rounds, "Market size is $4.2B, growing 12% a year (example.com/report). " * 4)
+        if "read_file" in names:
+            return self._tool_rounds(messages, self.execute_rounds, "Computed the totals from data.csv: 42.")
+        return AIMessage(content="Summary of all findings with sources. " * 10)
+
+
+SCENARIOS = {
+    "single_research": Scenario(
+        "single_research",
+        [Subtask(task="Research the market size with sources", assigned_to="researcher")],
+        ["What is the market size for home batteries?"],
+    ),
+    "parallel_research": Scenario(
+        "parallel_research",
+        [
+            Subtask(task="Research the market size", assigned_to="researcher", depends_on=[]),
+            Subtask(task="Research the main vendors", assigned_to="researcher", depends_on=[]),
+            Subtask(task="Research the regulation", assigned_to="researcher", depends_on=[]),
+            Subtask(task="Summarize the findings", assigned_to="summarizer"),
+        ],
+        ["Write a short market report on home batteries: size, vendors and regulation."],
+    ),
+    "research_then_execute": Scenario(
+        "research_then_execute",
+        [
+            Subtask(task="Research the market size", assigned_to="researcher"),
+            Subtask(task="Compute the totals from data.csv", assigned_to="executor"),
+        ],
+        ["Research the market size and compute the totals in data.csv."],
+    ),
+    "clarify_then_research": Scenario(
+        "clarify_then_research",
+        [Subtask(task="Research the market size with sources", assigned_to="researcher")],
+        ["Give me the market numbers.", "The last five years, please."],
+        clarify=True,
+    ),
+    "long_page_research": Scenario(
+        "long_page_research",
+        [Subtask(task="Research home batteries from an encyclopedia and a long report", assigned_to="researcher")],
+        ["Summarize what is known about home batteries."],
+        research_rounds=LONG_PAGE_ROUNDS,
+        page_paragraphs=80,
+        # With the default settings only the full wikipedia article goes to the index, never a page part
+        check=lambda r: None if r["offloaded"] == r["requests"] else f"{r['offloaded']} outputs offloaded, expected {r['requests']} (wikipedia only)",
+    ),
+    "long_thread": Scenario(
+        "long_thread",
+        [
+            Subtask(task="Research the requested figures", assigned_to="researcher"),
+            Subtask(task="Compute the totals from data.csv", assigned_to="executor"),
+        ],
+        [f"Research the {topic} figures and compute the totals in data.csv." for topic in ("2020", "2021", "2022", "2023", "2024", "2025")],
+        # Six turns of history on one thread: the subtask agents' prompts must stay the same size
+        track_prompt_growth=True,
+        check=lambda r: None if r["prompt_growth"] <= 1.1 else f"researcher/executor prompts grew {r['prompt_growth']}x over the thread",
+    ),
+    "summary_only": Scenario(
+        "summary_only",
+        [Subtask(task="Summarize the notes the user pasted", assigned_to="summarizer")],
+        ["Summarize these notes: sales grew 12% in Q1, 9% in Q2 and 15% in Q3."],
+    ),
+    "approve_side_effect": Scenario(
+        "approve_side_effect",
+        [Subtask(task="Send the report link on WhatsApp", assigned_to="executor", requires_side_effects=True)],
+        ["Send me the report link on WhatsApp.", "Yes, go ahead."],
+        execute_rounds=SEND_ROUNDS,
+        approve=True,
+    ),
+    "decline_side_effect": Scenario(
+        "decline_side_effect",
+        [Subtask(task="Send the report link on WhatsApp", assigned_to="executor", requires_side_effects=True)],
+        ["Send me the report link on WhatsApp.", "No, don't send it."],
+        execute_rounds=SEND_ROUNDS,
+        approve=False,
+        route_check=lambda turns: None if turns[-1][-1] == "finalizer" else "the declined request did not end at the finalizer",
+    ),
+    "redirect_side_effect": Scenario(
+        "redirect_side_effect",
+        [Subtask(task="Send the report link on WhatsApp", assigned_to="executor", requires_side_effects=True)],
+        ["Send me the report link on WhatsApp.", "No, send it to Bob instead."],
+        execute_rounds=SEND_ROUNDS,
+        approve=False,
+        redirect=True,
+        route_check=lambda turns: None if "planner" in turns[-1] else "the refusal with a new instruction was not replanned",
+    ),
+}
+
+
+class PeakRss:
+    """Samples the resident set size on a background thread while the block runs."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def current() -> int:
+        try:
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        # Process-wide high-water mark (KB on Linux, bytes on macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.current())
+
+    def __enter__(self):
+        self.peak = self.current()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p * len(ordered)) - 1)]
+
+
+def checkpoint_bytes(db_path: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        total = conn.execute("SELECT COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints").fetchone()[0]
+        total += conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes").fetchone()[0]
+    conn.close()
+    return total
+
+
+# Agents whose prompts are scoped to the current subtask and must not grow with the thread's history
+SCOPED_AGENTS = ("researcher", "executor", "summarizer")
+
+
+def prompt_growth(prompts: list[tuple[str, str, int]], turn_marks: dict[str, list[int]]) -> float:
+    """
+    Largest ratio, over threads and scoped agents, between the agent's biggest
+    prompt in the thread's last turn and in its first turn (1.0 = flat).
+    """
+    growth = 1.0
+    for thread_id, marks in turn_marks.items():
+        calls = [(agent, tokens) for t, agent, tokens in prompts if t == thread_id]
+        first, last = calls[:marks[1]] if len(marks) > 1 else calls, calls[marks[-1]:]
+        for agent in SCOPED_AGENTS:
+            before = max((tokens for a, tokens in first if a == agent), default=0)
+            after = max((tokens for a, tokens in last if a == agent), default=0)
+            if before and after:
+                growth = max(growth, after / before)
+    return round(growth, 2)
+
+
+async def run_scenario(
+    scenario: Scenario,
+    sessions: int,
+    requests: int,
+    llm_latency: float,
+    tool_latency: float,
+    browser_latency: float,
+    stream: bool = False
+) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "memory.db")
+        # Offloaded tool outputs go to a throwaway index too
+        output_index.close()
+        index_path, output_index.db_path = output_index.db_path, os.path.join(tmp, "tool_index.db")
+        model = ScriptedChatModel(respond=scenario.respond, latency=llm_latency)
+        runtime = SidekickRuntime(db_path=db_path)
+        await runtime.setup(llm=model)
+
+        sidekicks = []
+        for _ in range(sessions):
+            sidekick = Sidekick()
+            sidekick.bind(runtime, *stub_tools(tool_latency, browser_latency, scenario.page_paragraphs))
+            sidekicks.append(sidekick)
+
+        latencies: list[float] = []
+        # Per thread: how many of its LLM calls were made before each turn
+        turn_marks: dict[str, list[int]] = {}
+        first_updates: list[float] = []
+        first_tokens: list[float] = []
+
+        async def streamed_turn(sidekick: Sidekick, turn: str, history: list) -> list:
+            start = time.perf_counter()
+            updates = []
+            async for history, _ in sidekick.stream_superstep(turn, history):
+                updates.append((time.perf_counter() - start, history[-1]["content"]))
+            # The answer started with the first update that is a prefix of the final one
+            answer = updates[-1][1]
+            first_updates.append(updates[0][0])
+            first_tokens.append(next(t for t, content in updates if content and answer.startswith(content)))
+            return history
+
+        async def session(sidekick: Sidekick):
+            for _ in range(requests):
+                history = []
+                start = time.perf_counter()
+                for turn in scenario.turns:
+                    turn_marks.setdefault(sidekick.sidekick_id, []).append(
+                        sum(1 for thread_id, _, _ in model.prompts if thread_id == sidekick.sidekick_id)
+                    )
+                    if stream:
+                        history = await streamed_turn(sidekick, turn, history)
+                    else:
+                        history, _ = await sidekick.run_superstep(turn, history)
+                latencies.append(time.perf_counter() - start)
+
+        try:
+            with PeakRss() as rss:
+                start = time.perf_counter()
+                await asyncio.gather(*(session(sidekick) for sidekick in sidekicks))
+                wall = time.perf_counter() - start
+            offloaded = output_index.stats()["outputs"]
+        finally:
+            # A failed run must still stop the runtime's threads, or the process never exits
+            await runtime.shutdown()
+            output_index.db_path = index_path
+        stored = checkpoint_bytes(db_path)
+
+    report = {
+        "scenario": scenario.name,
+        "sessions": sessions,
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / wall, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "llm_calls": model.calls,
+        "checkpoint_kb": round(stored / 1024, 1),
+        "peak_rss_mb": round(rss.peak / 2**20, 1),
+        "offloaded": offloaded,
+        "prompt_growth": prompt_growth(model.prompts, turn_marks) if scenario.track_prompt_growth else "-",
+    }
+    if stream:
+        # Per turn: first progress line and first answer token, against p50_ms for the whole request
+        report["first_update_p50_ms"] = round(percentile(first_updates, 0.50) * 1000, 1)
+        report["first_token_p50_ms"] = round(percentile(first_tokens, 0.50) * 1000, 1)
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), nargs="+", default=list(SCENARIOS))
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8], help="concurrent sessions")
+    parser.add_argument("--requests", type=int, default=3, help="requests per session, on the same thread")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per chat model call")
+    parser.add_argument("--tool-latency", type=float, default=0.02, help="seconds per search / file tool call")
+    parser.add_argument("--browser-latency", type=float, default=0.2, help="seconds per browser tool call")
+    parser.add_argument("--stream", action="store_true", help="run turns through stream_superstep and report time to first update / answer token")
+    parser.add_argument("--json", action="store_true", help="print one JSON report per line")
+    args = parser.parse_args()
+
+    columns = ["scenario", "sessions", "requests", "throughput_rps", "p50_ms", "p99_ms", "llm_calls", "checkpoint_kb", "peak_rss_mb", "offloaded", "prompt_growth"]
+    if args.stream:
+        columns += ["first_update_p50_ms", "first_token_p50_ms"]
+    if not args.json:
+        print(" ".join(f"{c:>22}" if c == "scenario" else f"{c:>14}" for c in columns))
+    failures = []
+    for name in args.scenario:
+        for sessions in args.sessions:
+            report = await run_scenario(SCENARIOS[name], sessions, args.requests, args.llm_latency, args.tool_latency, args.browser_latency, args.stream)
+            if args.json:
+                print(json.dumps(report))
+            else:
+                print(" ".join(f"{report[c]:>22}" if c == "scenario" else f"{report[c]:>14}" for c in columns))
+            problem = SCENARIOS[name].check(report) if SCENARIOS[name].check else None
+            if problem:
+                failures.append(f"{name} ({sessions} sessions): {problem}")
+
+    for failure in failures:
+        print(f"check failed: {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
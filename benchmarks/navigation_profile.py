@@ -0,0 +1,125 @@
+"""
+Page-load latency of navigate_browser + extract_text on a local fixture
+site, per navigation profile:
+
+    browser           full Chromium, every resource loaded
+    browser_blocking  Chromium with images, media, fonts and tracker domains aborted
+    auto              plain HTTP GET for static pages, browser (with blocking) otherwise
+
+The fixture serves a static article with slow images, a web font and a slow
+third-party tracker script (served from `localhost`, which the blocking
+profiles treat as an ad/analytics domain), and a script-rendered app shell
+that the HTTP fast path must hand over to the browser.
+
+    python -m benchmarks.navigation_profile --repeat 5 --asset-delay 0.05
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from tools.fetch import NavigationProfile
+from tools.navigation import BrowserManager, SessionPages, page_tools
+from benchmarks.page_extraction import synthetic_page
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+
+
+ASSET = b"\0" * 200_000
+
+
+def fixture_handler(asset_delay: float, tracker_delay: float, port: int) -> type:
+    assets = "".join(f'<img src="/img/{i}.png">' for i in range(8))
+    head = (
+        f'<style>@font-face {{ font-family: F; src: url(/font.woff2); }} body {{ font-family: F; }}</style>'
+        f'<script src="http://localhost:{port}/track.js"></script>'
+    )
+    article = synthetic_page(40).replace("<head>", "<head>" + head).replace("<main>", "<main>" + assets)
+    app = (
+        "<!doctype html><html><head>" + head + "</head><body><div id='root'></div><script>"
+        "document.getElementById('root').innerHTML = '<main><h1>App report</h1>' + "
+        "Array.from({length: 40}, (_, i) => '<p>Paragraph ' + i + ' rendered by the app with figures and sources.</p>').join('') + '</main>';"
+        "</script></body></html>"
+    )
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, body: bytes, content_type: str, delay: float = 0.0):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path == "/article.html":
+                self._send(article.encode(), "text/html; charset=utf-8")
+            elif path == "/app.html":
+                self._send(app.encode(), "text/html; charset=utf-8")
+            elif path.startswith("/img/"):
+                self._send(ASSET, "image/png", asset_delay)
+            elif path == "/font.woff2":
+                self._send(ASSET, "font/woff2", asset_delay)
+            elif path == "/track.js":
+                self._send(b"window.tracked = true;", "application/javascript", tracker_delay)
+            else:
+                self.send_error(404)
+
+    return Handler
+
+
+PROFILES = {
+    "browser": dict(block_resources=(), block_domains=(), http_first=False),
+    "browser_blocking": dict(block_domains=("localhost",), http_first=False),
+    "auto": dict(block_domains=("localhost",), http_first=True),
+}
+
+
+async def measure(profile: NavigationProfile, url: str, repeat: int, run: int) -> tuple[float, dict]:
+    manager = BrowserManager(headless=True, profile=profile)
+    tools = {t.name: t for t in page_tools(SessionPages(manager, f"bench-{run}"))}
+    samples = []
+    try:
+        for i in range(repeat):
+            start = time.perf_counter()
+            # A fresh query string per load keeps the page text cache out of the measurement
+            await tools["navigate_browser"].ainvoke({"url": f"{url}?run={run}&i={i}"})
+            text = await tools["extract_text"].ainvoke({})
+            samples.append(time.perf_counter() - start)
+            if "part 1/" not in text:
+                raise RuntimeError(text)
+        return statistics.median(samples) * 1000, profile.stats()
+    finally:
+        await manager.shutdown()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--asset-delay", type=float, default=0.05, help="seconds per image / font response")
+    parser.add_argument("--tracker-delay", type=float, default=0.3, help="seconds for the third-party script")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BaseHTTPRequestHandler)
+    port = server.server_address[1]
+    server.RequestHandlerClass = fixture_handler(args.asset_delay, args.tracker_delay, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"{'profile':>18} {'page':>14} {'median_ms':>10}  stats")
+    run = 0
+    for name, options in PROFILES.items():
+        for page in ("article.html", "app.html"):
+            run += 1
+            try:
+                latency, stats = await measure(NavigationProfile(**options), f"http://127.0.0.1:{port}/{page}", args.repeat, run)
+                print(f"{name:>18} {page:>14} {latency:>10.1f}  {stats}")
+            except Exception as e:
+                print(f"{name:>18} {page:>14} {'-':>10}  unavailable: {type(e).__name__}: {str(e).splitlines()[0][:90]}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Cost and size of extract_text's output: the Playwright toolkit's
+BeautifulSoup dump of every string on the page against main_text, and the
+page text cache's parse-free path.
+
+The page is synthetic but shaped like a news/article page: scripts, a mega
+menu, cookie banner, sidebar, related links, comments and footer around a
+long article.
+
+    python -m benchmarks.page_extraction --paragraphs 40 --repeat 50
+"""
+from bs4 import BeautifulSoup
+from tools.cache import ToolResultCache
+from tools.extraction import PageTextCache, chunk_text, main_text
+from utils.utils import estimate_tokens
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+
+def synthetic_page(paragraphs: int) -> str:
+    menu = "".join(f"<li><a href='/section/{i}'>Section {i}</a><ul>{''.join(f'<li><a href=/s/{i}/{j}>Topic {i}.{j}</a></li>' for j in range(12))}</ul></li>" for i in range(10))
+    article = "".join(
+        f"<h2>Heading {i}</h2><p>Paragraph {i} explains the market in detail, with figures for {2015 + i % 10}, "
+        f"sources and a comparison against the previous period. Growth was {i % 7 + 3}% year on year.</p>"
+        for i in range(paragraphs)
+    )
+    related = "".join(f"<li><a href='/related/{i}'>Related story number {i} you may like</a></li>" for i in range(30))
+    comments = "".join(f"<div class='comment'><b>user{i}</b><p>Comment {i}: great article!</p></div>" for i in range(25))
+    return f"""<!doctype html><html><head><title>Market report</title>
+<script>{"var tracking = {};" * 400}</script><style>{"body {{ margin: 0 }}" * 300}</style></head>
+<body>
+<div id="cookie-banner">We use cookies to improve your experience. <button>Accept</button></div>
+<header class="site-header"><nav><ul>{menu}</ul></nav></header>
+<div class="layout">
+<aside class="sidebar"><h3>Most read</h3><ul>{related}</ul></aside>
+<main><article><header><h1>Home battery market report</h1><p>By A. Writer</p></header>{article}</article>
+<section class="related-stories"><ul>{related}</ul></section>
+<section id="comments">{comments}</section></main>
+</div>
+<footer class="site-footer"><p>Copyright 2025</p><ul>{related}</ul></footer>
+<script>{"analytics();" * 400}</script>
+</body></html>"""
+
+
+def toolkit_text(html: str) -> str:
+    soup = BeautifulSoup(html, "lxml")
+    return " ".join(text for text in soup.stripped_strings)
+
+
+def timed(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--chunk-chars", type=int, default=6000)
+    args = parser.parse_args()
+
+    html = synthetic_page(args.paragraphs)
+    url = "https://example.com/market-report"
+    print(f"# page: {len(html) / 1024:.0f} KB of HTML")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ToolResultCache(db_path=os.path.join(tmp, "pages.db"))
+        pages = PageTextCache(cache)
+        pages.extract(url, html)
+        rows = [
+            ("toolkit_bs4", lambda: toolkit_text(html), toolkit_text(html)),
+            ("main_text", lambda: main_text(html), main_text(html)),
+            ("cache_same_html", lambda: pages.extract(url, html), main_text(html)),
+        ]
+        print(f"{'path':>16} {'median_ms':>10} {'chars':>8} {'tokens':>8} {'first_part_tokens':>18}")
+        for name, func, text in rows:
+            first = chunk_text(text, args.chunk_chars)[0] if name != "toolkit_bs4" else text
+            print(f"{name:>16} {timed(func, args.repeat):>10.2f} {len(text):>8} {estimate_tokens(text):>8} {estimate_tokens(first):>18}")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Replays a recorded thread (see utils/recording.py) through the real graph,
+checkpointer and routers with no network access, and reports how long the
+graph itself takes per turn.
+
+Recorded LLM responses are matched to requests by node and by the request
+content, with prompts stamped with the date of the recorded turn; when the
+prompt changed since the recording, the next unused response of the same
+node is used instead. Tool results are matched the same way on the tool name
+and arguments.
+
+    SIDEKICK_RECORD_DIR=db/recordings python app.py        # record
+    python -m benchmarks.replay db/recordings/<thread>.jsonl --repeat 5
+"""
+from typing import Any, Optional
+from collections import defaultdict
+from langchain_core.messages import AIMessage, BaseMessage, messages_from_dict
+from langchain_core.tools import StructuredTool
+from langgraph.config import get_config
+from sidekick import Sidekick, SidekickRuntime
+from utils.recording import load_recording, request_key, tool_key
+from utils.utils import PROMPT_DATE
+from benchmarks.fakes import ScriptedChatModel, stub_tools
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+
+def _current_node() -> Optional[str]:
+    try:
+        return get_config().get("metadata", {}).get("langgraph_node")
+    except RuntimeError:
+        return None
+
+
+class Recording:
+    def __init__(self, events: list[dict]):
+        # Responses are consumed as they are replayed, so every replay gets its own copies
+        events = [dict(e) for e in events]
+        self.turns = [e["content"] for e in events if e["kind"] == "turn"]
+        self.dates = [e.get("date") for e in events if e["kind"] == "turn"]
+        self.tool_names = sorted({e["name"] for e in events if e["kind"] == "tool"})
+        self.recorded_llm_seconds = sum(e.get("duration", 0) for e in events if e["kind"] == "llm")
+        self.recorded_tool_seconds = sum(e.get("duration", 0) for e in events if e["kind"] == "tool")
+        self.counts = defaultdict(int)
+        self._exact: dict[tuple, list[dict]] = defaultdict(list)
+        self._ordered: dict[tuple, list[dict]] = defaultdict(list)
+        for event in events:
+            if event["kind"] == "llm":
+                self._exact[(event["node"], event["key"])].append(event)
+                self._ordered[(event["node"],)].append(event)
+            elif event["kind"] == "tool":
+                self._exact[(event["node"], event["name"], tool_key(event["input"]))].append(event)
+                self._ordered[(event["node"], event["name"])].append(event)
+
+    def _take(self, exact: tuple, ordered: tuple, kind: str) -> Optional[dict]:
+        for match, candidates in (("exact", self._exact.get(exact, [])), ("fallback", self._ordered.get(ordered, []))):
+            event = next((e for e in candidates if not e.get("used")), None)
+            if event is not None:
+                event["used"] = True
+                self.counts[f"{kind}_{match}"] += 1
+                return event
+        self.counts[f"{kind}_missing"] += 1
+        return None
+
+    def respond(self, messages: list[BaseMessage], names: list[str], metadata: dict) -> AIMessage:
+        node = metadata.get("langgraph_node")
+        event = self._take((node, request_key(messages)), (node,), "llm")
+        if event is None:
+            raise RuntimeError(f"No recorded LLM response left for node {node}")
+        return messages_from_dict([event["response"]])[0]
+
+    def tool_output(self, name: str, inputs: Any) -> str:
+        node = _current_node()
+        event = self._take((node, name, tool_key(inputs)), (node, name), "tool")
+        if event is None:
+            return f"[replay] no recorded result for {name}"
+        if "error" in event:
+            raise RuntimeError(event["error"])
+        return event["output"]
+
+
+def _replay_tool(recording: Recording, name: str) -> StructuredTool:
+    async def run(**kwargs) -> str:
+        return recording.tool_output(name, kwargs)
+
+    # A JSON schema with no properties passes recorded arguments through unvalidated
+    schema = {"type": "object", "properties": {}, "additionalProperties": True}
+    return StructuredTool.from_function(coroutine=run, name=name, description=f"Replayed {name}", args_schema=schema)
+
+
+def replay_tools(recording: Recording) -> list[StructuredTool]:
+    names = set(recording.tool_names) | {t.name for tools in stub_tools() for t in tools}
+    return [_replay_tool(recording, name) for name in sorted(names)]
+
+
+async def replay(events: list[dict], llm_latency: float) -> dict:
+    recording = Recording(events)
+    with tempfile.TemporaryDirectory() as tmp:
+        runtime = SidekickRuntime(db_path=os.path.join(tmp, "memory.db"))
+        await runtime.setup(llm=ScriptedChatModel(respond=recording.respond, latency=llm_latency))
+        turn_ms, history, error = [], [], None
+        try:
+            tools = replay_tools(recording)
+            sidekick = Sidekick()
+            sidekick.bind(runtime, tools, tools)
+            for turn, date in zip(recording.turns, recording.dates):
+                PROMPT_DATE.set(date)
+                start = time.perf_counter()
+                history, _ = await sidekick.run_superstep(turn, history)
+                turn_ms.append(round((time.perf_counter() - start) * 1000, 1))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            await runtime.shutdown()
+
+    return {
+        "turn_ms": turn_ms,
+        "total_ms": round(sum(turn_ms), 1),
+        "recorded_llm_s": round(recording.recorded_llm_seconds, 2),
+        "recorded_tool_s": round(recording.recorded_tool_seconds, 2),
+        **dict(sorted(recording.counts.items())),
+        "error": error,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", help="JSONL file written with SIDEKICK_RECORD_DIR set")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds added to every replayed LLM call")
+    args = parser.parse_args()
+
+    events = load_recording(args.recording)
+    for i in range(args.repeat):
+        print(json.dumps({"run": i + 1, **await replay(events, args.llm_latency)}))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""
+Latency and largest prompt of the summarizer node, single call against
+map-reduce, as the researchers' results grow.
+
+The model's latency grows with its prompt (`--prompt-latency` seconds per 1k
+prompt tokens) and its output (`--token-latency` seconds per output token):
+condensing calls return ~150 tokens, the final summary ~400. Single-call
+prompts past the model's context window (`--context`) are reported as such.
+The `no_shrink` rows use a model whose condensing calls return their input
+unchanged: map-reduce must stop after one round and still fit its final
+prompt within the threshold.
+
+    python -m benchmarks.summarization --sizes 2000 10000 40000 120000
+"""
+from langchain_core.messages import AIMessage
+from agents.summarizer import MAP_PROMPT, summarizer_agent
+from schema import State, Subtask
+from benchmarks.fakes import ScriptedChatModel
+from utils.utils import estimate_tokens
+import argparse
+import asyncio
+import time
+
+
+def results(total_tokens: int, per_result: int = 2500) -> list[str]:
+    sentence = "Vendor {i} reported revenue of {v} million in 2024, up {g}% on the year, per its annual filing. "
+    out, i = [], 0
+    while sum(estimate_tokens(r) for r in out) < total_tokens:
+        text = ""
+        while estimate_tokens(text) < per_result:
+            text += sentence.format(i=i, v=100 + i % 900, g=i % 30)
+            i += 1
+        out.append(text)
+    return out
+
+
+def respond(messages, names, metadata, shrink: bool = True) -> AIMessage:
+    if messages[0].content == MAP_PROMPT:
+        if not shrink:
+            return AIMessage(content=messages[1].content.split("Results:\n", 1)[1])
+        return AIMessage(content="Condensed point with figures and source. " * 15)
+    return AIMessage(content="Summary paragraph with the key figures and their sources. " * 28)
+
+
+async def measure(model: ScriptedChatModel, state: State, map_threshold: int, chunk_tokens: int, concurrency: int, shrink: bool = True) -> tuple[float, int]:
+    prompts = []
+    model.respond = lambda messages, names, metadata: (
+        prompts.append(sum(estimate_tokens(str(m.content)) for m in messages)) or respond(messages, names, metadata, shrink)
+    )
+    model.calls = 0
+    start = time.perf_counter()
+    await summarizer_agent(model, state, map_threshold=map_threshold, chunk_tokens=chunk_tokens, max_concurrency=concurrency)
+    return (time.perf_counter() - start) * 1000, max(prompts)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 10000, 40000, 120000], help="tokens of subtask results")
+    parser.add_argument("--threshold", type=int, default=8000)
+    parser.add_argument("--chunk-tokens", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--context", type=int, default=128000)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--prompt-latency", type=float, default=0.05)
+    parser.add_argument("--token-latency", type=float, default=0.002)
+    args = parser.parse_args()
+
+    model = ScriptedChatModel(respond=respond, latency=args.latency, prompt_latency=args.prompt_latency, token_latency=args.token_latency)
+    print(f"{'result_tokens':>13} {'mode':>11} {'ms':>8} {'calls':>6} {'max_prompt_tokens':>18}")
+    for size in args.sizes:
+        state = State(
+            subtasks=[Subtask(task="Research vendors", assigned_to="researcher"), Subtask(task="Summarize vendor revenue and growth", assigned_to="summarizer")],
+            next_subtask_index=1,
+            subtask_results=results(size)
+        )
+        for mode, threshold, shrink in (("single", 10 ** 9, True), ("map_reduce", args.threshold, True), ("no_shrink", args.threshold, False)):
+            ms, largest = await measure(model, state, threshold, args.chunk_tokens, args.concurrency, shrink)
+            note = "  exceeds context" if largest > args.context else ""
+            print(f"{size:>13} {mode:>11} {ms:>8.0f} {model.calls:>6} {largest:>18}{note}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+Latency of one batch of parallel tool calls, as the researcher and executor
+emit them, through the stock ToolNode and through BoundedToolNode.
+
+The tools are blocking functions (like the Serper, Wikipedia, Twilio and file
+tools) that sleep for their latency. With enough workers, a batch should take
+about as long as its slowest call; the stock ToolNode shares the event loop's
+default executor (min(32, CPUs + 4) threads), so wide batches queue behind it.
+
+    python -m benchmarks.tool_concurrency --batch 4 8 16 --repeat 5
+"""
+from langchain_core.messages import AIMessage
+from langchain_core.tools import StructuredTool
+from langgraph.prebuilt import ToolNode
+from tools.concurrency import BoundedToolNode, ToolRunner
+from benchmarks.fakes import tool_call
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+
+# (tool, latency in seconds) cycled to fill a batch
+CALL_MIX = [("search", 0.30), ("wikipedia", 0.40), ("read_file", 0.05), ("search", 0.25), ("send_whatsapp", 0.20)]
+
+
+def blocking_tool(name: str, latency: float) -> StructuredTool:
+    def run(query: str) -> str:
+        time.sleep(latency)
+        return f"{name} result for {query}"
+
+    return StructuredTool.from_function(func=run, name=name, description=f"Blocking {name}")
+
+
+def batch(size: int) -> AIMessage:
+    calls = [CALL_MIX[i % len(CALL_MIX)][0] for i in range(size)]
+    return AIMessage(content="", tool_calls=[tool_call(name, query=f"q{i}") for i, name in enumerate(calls)])
+
+
+async def time_batch(node, message: AIMessage, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await node.ainvoke({"messages": [message]})
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, nargs="+", default=[4, 8, 16], help="tool calls per batch")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=16, help="BoundedToolNode thread pool size")
+    args = parser.parse_args()
+
+    latencies = dict(CALL_MIX)
+    tools = [blocking_tool(name, latency) for name, latency in latencies.items()]
+    # No limits, to compare executors; the limited run shows what the production limits cost
+    unlimited = ToolRunner(max_workers=args.workers, limits={name: 64 for name in latencies}, default_limit=64)
+    limited = ToolRunner(max_workers=args.workers)
+    nodes = {
+        "tool_node_ms": ToolNode(tools),
+        "bounded_ms": BoundedToolNode(tools, runner=unlimited),
+        "bounded_limits_ms": BoundedToolNode(tools, runner=limited),
+    }
+
+    print(f"# {os.cpu_count()} CPUs, default executor has {min(32, (os.cpu_count() or 1) + 4)} workers")
+    columns = ["batch", "sequential_ms", "slowest_call_ms", *nodes]
+    print(" ".join(f"{c:>18}" for c in columns))
+    for size in args.batch:
+        message = batch(size)
+        row = {
+            "batch": size,
+            "sequential_ms": sum(latencies[c["name"]] for c in message.tool_calls) * 1000,
+            "slowest_call_ms": max(latencies[c["name"]] for c in message.tool_calls) * 1000,
+        }
+        for column, node in nodes.items():
+            row[column] = await time_batch(node, message, args.repeat) * 1000
+        print(" ".join(f"{row[c]:>18.0f}" for c in columns))
+
+    unlimited.close()
+    limited.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
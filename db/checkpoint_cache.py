@@ -0,0 +1,264 @@
+from typing import Any, AsyncIterator, Optional, Sequence
+from collections import OrderedDict
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    copy_checkpoint,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+import asyncio
+import json
+import time
+
+
+_PUT_CHECKPOINT = "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata) VALUES (?, ?, ?, ?, ?, ?, ?)"
+_REPLACE_WRITE = "INSERT OR REPLACE INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+# Same order as the pending writes AsyncSqliteSaver returns, which come without their idx
+_WRITE_INDICES = "SELECT task_id, idx FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx"
+_IGNORE_WRITE = "INSERT OR IGNORE INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+# Writes on these channels mean the run is about to stop
+_DURABLE_CHANNELS = ("__interrupt__", "__error__")
+
+
+class _CachedThread:
+    def __init__(self, checkpoint_tuple: CheckpointTuple, write_keys: Sequence[tuple[str, int]] = ()):
+        """`write_keys` holds the (task_id, idx) of each of the tuple's pending writes."""
+        self.tuple = checkpoint_tuple
+        self.writes: dict[tuple[str, int], tuple[str, str, Any]] = dict(
+            zip(write_keys, checkpoint_tuple.pending_writes or [])
+        )
+
+    @property
+    def checkpoint_id(self) -> str:
+        return self.tuple.config["configurable"]["checkpoint_id"]
+
+    def snapshot(self) -> CheckpointTuple:
+        return CheckpointTuple(
+            self.tuple.config,
+            copy_checkpoint(self.tuple.checkpoint),
+            self.tuple.metadata,
+            self.tuple.parent_config,
+            [self.writes[key] for key in sorted(self.writes)],
+        )
+
+
+class CachedCheckpointSaver(BaseCheckpointSaver):
+    """
+    Write-behind cache in front of an AsyncSqliteSaver.
+
+    The latest checkpoint (and its pending writes) of the `max_threads` most
+    recently used threads is served from memory, so the read at the start of
+    every step never touches SQLite. Writes are serialized immediately and
+    committed in batches by a background task every `flush_interval` seconds;
+    `flush()` forces them out and runs automatically on interrupts and errors.
+
+    Anything the cache can't answer (history, older checkpoints, cold threads)
+    flushes first and falls through to the wrapped saver.
+    """
+
+    def __init__(self, saver: AsyncSqliteSaver, max_threads: int = 256, flush_interval: float = 0.05):
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.max_threads = max_threads
+        self.flush_interval = flush_interval
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.flush_lag_total = 0.0
+        self.flush_lag_max = 0.0
+        self._threads: OrderedDict[tuple[str, str], _CachedThread] = OrderedDict()
+        self._pending_checkpoints: list[tuple] = []
+        self._pending_writes: list[tuple[str, list[tuple]]] = []
+        self._oldest_pending: Optional[float] = None
+        self._flush_lock = asyncio.Lock()
+        self._dirty = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _key(config: RunnableConfig) -> tuple[str, str]:
+        return str(config["configurable"]["thread_id"]), config["configurable"].get("checkpoint_ns", "")
+
+    def _remember(self, key: tuple[str, str], entry: _CachedThread):
+        self._threads[key] = entry
+        self._threads.move_to_end(key)
+        while len(self._threads) > self.max_threads:
+            self._threads.popitem(last=False)
+
+    def _enqueue(self):
+        if self._oldest_pending is None:
+            self._oldest_pending = time.monotonic()
+        self._dirty.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        key = self._key(config)
+        checkpoint_id = get_checkpoint_id(config)
+        entry = self._threads.get(key)
+        if entry is not None and checkpoint_id in (None, entry.checkpoint_id):
+            self._threads.move_to_end(key)
+            self.hits += 1
+            return entry.snapshot()
+
+        self.misses += 1
+        await self.flush()
+        # Holding the flush lock keeps both reads on the same rows
+        async with self._flush_lock:
+            checkpoint_tuple = await self.saver.aget_tuple(config)
+            if checkpoint_tuple is None or checkpoint_id is not None:
+                return checkpoint_tuple
+            async with self.saver.lock:
+                cursor = await self.saver.conn.execute(
+                    _WRITE_INDICES, (*key, checkpoint_tuple.config["configurable"]["checkpoint_id"])
+                )
+                write_keys = [(task_id, idx) for task_id, idx in await cursor.fetchall()]
+        if len(write_keys) == len(checkpoint_tuple.pending_writes or []):
+            self._remember(key, _CachedThread(checkpoint_tuple, write_keys))
+        return checkpoint_tuple
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[CheckpointTuple]:
+        await self.flush()
+        async for checkpoint_tuple in self.saver.alist(config, filter=filter, before=before, limit=limit):
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        thread_id, checkpoint_ns = self._key(config)
+        parent_id = config["configurable"].get("checkpoint_id")
+        metadata = get_checkpoint_metadata(config, metadata)
+        type_, serialized_checkpoint = self.serde.dumps_typed(checkpoint)
+        self._pending_checkpoints.append((
+            thread_id,
+            checkpoint_ns,
+            checkpoint["id"],
+            parent_id,
+            type_,
+            serialized_checkpoint,
+            json.dumps(metadata, ensure_ascii=False).encode("utf-8", "ignore"),
+        ))
+        self._enqueue()
+
+        new_config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+        parent_config = (
+            {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+            if parent_id
+            else None
+        )
+        self._remember((thread_id, checkpoint_ns), _CachedThread(CheckpointTuple(new_config, checkpoint, metadata, parent_config, [])))
+        return new_config
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = ""
+    ) -> None:
+        key = self._key(config)
+        checkpoint_id = str(config["configurable"]["checkpoint_id"])
+        replace = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        rows = []
+        entry = self._threads.get(key)
+        for i, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, i)
+            rows.append((*key, checkpoint_id, task_id, idx, channel, *self.serde.dumps_typed(value)))
+            # Mirror the upsert semantics of the SQL below
+            if entry is not None and entry.checkpoint_id == checkpoint_id and (replace or (task_id, idx) not in entry.writes):
+                entry.writes[(task_id, idx)] = (task_id, channel, value)
+        self._pending_writes.append((_REPLACE_WRITE if replace else _IGNORE_WRITE, rows))
+        self._enqueue()
+
+        if any(channel in _DURABLE_CHANNELS for channel, _ in writes):
+            await self.flush()
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        for key in [key for key in self._threads if key[0] == str(thread_id)]:
+            del self._threads[key]
+        await self.flush()
+        await self.saver.adelete_thread(thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        return self.saver.get_next_version(current, channel)
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending_checkpoints and not self._pending_writes:
+                return
+            checkpoints, self._pending_checkpoints = self._pending_checkpoints, []
+            writes, self._pending_writes = self._pending_writes, []
+            oldest, self._oldest_pending = self._oldest_pending, None
+            self._dirty.clear()
+
+            await self.saver.setup()
+            try:
+                async with self.saver.lock:
+                    conn = self.saver.conn
+                    if checkpoints:
+                        await conn.executemany(_PUT_CHECKPOINT, checkpoints)
+                    for query, rows in writes:
+                        await conn.executemany(query, rows)
+                    await conn.commit()
+            except BaseException:
+                # Keep the batch so the next flush retries it
+                self._pending_checkpoints[:0] = checkpoints
+                self._pending_writes[:0] = writes
+                self._oldest_pending = oldest
+                self._dirty.set()
+                raise
+
+            lag = time.monotonic() - oldest if oldest is not None else 0.0
+            self.flushes += 1
+            self.flushed_rows += len(checkpoints) + sum(len(rows) for _, rows in writes)
+            self.flush_lag_total += lag
+            self.flush_lag_max = max(self.flush_lag_max, lag)
+
+    async def _flush_loop(self):
+        while True:
+            await self._dirty.wait()
+            # Let the rest of the super-step pile into the same batch
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Exception during checkpoint flush: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "cached_threads": len(self._threads),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "pending_rows": len(self._pending_checkpoints) + sum(len(rows) for _, rows in self._pending_writes),
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "flush_lag_ms_avg": round(self.flush_lag_total / self.flushes * 1000, 3) if self.flushes else 0.0,
+            "flush_lag_ms_max": round(self.flush_lag_max * 1000, 3),
+        }
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
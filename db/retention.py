@@ -0,0 +1,196 @@
+from typing import Optional
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+import asyncio
+import os
+import time
+
+
+# Offset between the UUID (Gregorian) epoch and the Unix epoch, in 100ns units
+_UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+
+def checkpoint_id_before(seconds_ago: float) -> str:
+    """
+    Lower bound for checkpoint ids created `seconds_ago` or later.
+
+    Checkpoint ids are time-ordered UUIDv6 strings, so the leading 48 timestamp
+    bits compare lexicographically with any id created at or after that time.
+    """
+    timestamp = int((time.time() - seconds_ago) * 10_000_000) + _UUID_EPOCH_OFFSET
+    high = f"{(timestamp >> 12) & 0xFFFFFFFFFFFF:012x}"
+    return f"{high[:8]}-{high[8:]}"
+
+
+class CheckpointRetention:
+    """
+    Retention and compaction for the SQLite checkpoint database.
+
+    - keeps only the latest `keep_last` checkpoints (and their writes) per thread
+    - drops threads with no checkpoint in the last `thread_ttl` seconds
+    - truncates the WAL and incrementally vacuums freed pages
+
+    Maintenance runs on the saver's own connection under its lock, so it never
+    interleaves with checkpoint reads or writes.
+    """
+
+    def __init__(
+        self,
+        saver: AsyncSqliteSaver,
+        db_path: str,
+        keep_last: int = 20,
+        thread_ttl: float = 7 * 86400,
+        interval: float = 600.0,
+        vacuum_pages: int = 2000
+    ):
+        if keep_last < 1:
+            raise ValueError("keep_last must be at least 1")
+        self.saver = saver
+        self.db_path = db_path
+        self.keep_last = keep_last
+        self.thread_ttl = thread_ttl
+        self.interval = interval
+        self.vacuum_pages = vacuum_pages
+        self.runs = 0
+        self.pruned_total = 0
+        self.expired_total = 0
+        self._measured: dict = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def prune_checkpoints(self) -> int:
+        await self.saver.setup()
+        async with self.saver.lock:
+            cursor = await self.saver.conn.execute(
+                """
+                DELETE FROM checkpoints WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, ROW_NUMBER() OVER (
+                            PARTITION BY thread_id, checkpoint_ns
+                            ORDER BY checkpoint_id DESC
+                        ) AS position
+                        FROM checkpoints
+                    ) WHERE position > ?
+                )
+                """,
+                (self.keep_last,)
+            )
+            deleted = cursor.rowcount
+            await self._delete_orphan_writes()
+            await self.saver.conn.commit()
+            return deleted
+
+    async def expire_threads(self) -> int:
+        await self.saver.setup()
+        cutoff = checkpoint_id_before(self.thread_ttl)
+        async with self.saver.lock:
+            cursor = await self.saver.conn.execute(
+                """
+                DELETE FROM checkpoints WHERE thread_id IN (
+                    SELECT thread_id FROM checkpoints
+                    GROUP BY thread_id
+                    HAVING MAX(checkpoint_id) < ?
+                )
+                """,
+                (cutoff,)
+            )
+            deleted = cursor.rowcount
+            await self._delete_orphan_writes()
+            await self.saver.conn.commit()
+            return deleted
+
+    async def compact(self, full: bool = False):
+        """
+        Truncates the WAL and returns free pages to the OS. `full=True` runs a
+        one-off VACUUM, which also switches databases created before incremental
+        auto-vacuum was enabled; it needs exclusive access and can be slow.
+        """
+        async with self.saver.lock:
+            conn = self.saver.conn
+            if full:
+                await conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+                await conn.execute("VACUUM;")
+            else:
+                # Frees one page per step, so the statement must be fully consumed
+                async with conn.execute(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)});") as cursor:
+                    await cursor.fetchall()
+            await conn.commit()
+            await conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+
+    async def measure(self) -> dict:
+        """Counts rows and pages; full-table scans under the saver's lock, so only run by the retention pass."""
+        await self.saver.setup()
+        async with self.saver.lock:
+            conn = self.saver.conn
+
+            async def scalar(sql: str) -> int:
+                async with conn.execute(sql) as cursor:
+                    row = await cursor.fetchone()
+                    return row[0] if row else 0
+
+            self._measured = {
+                "threads": await scalar("SELECT COUNT(DISTINCT thread_id) FROM checkpoints"),
+                "checkpoints": await scalar("SELECT COUNT(*) FROM checkpoints"),
+                "writes": await scalar("SELECT COUNT(*) FROM writes"),
+                "page_size": await scalar("PRAGMA page_size"),
+                "page_count": await scalar("PRAGMA page_count"),
+                "freelist_pages": await scalar("PRAGMA freelist_count"),
+                "auto_vacuum": {0: "none", 1: "full", 2: "incremental"}.get(await scalar("PRAGMA auto_vacuum"), "unknown"),
+            }
+        return self._measured
+
+    def report(self) -> dict:
+        """Counts as of the last retention pass, plus the current file sizes; never touches the database."""
+        return {
+            **self._measured,
+            "db_bytes": self._file_size(self.db_path),
+            "wal_bytes": self._file_size(f"{self.db_path}-wal"),
+            "runs": self.runs,
+            "pruned_checkpoints_total": self.pruned_total,
+            "expired_checkpoints_total": self.expired_total,
+        }
+
+    async def run_once(self) -> dict:
+        pruned = await self.prune_checkpoints()
+        expired = await self.expire_threads()
+        await self.compact()
+        await self.measure()
+        self.runs += 1
+        self.pruned_total += pruned
+        self.expired_total += expired
+        return {"pruned_checkpoints": pruned, "expired_checkpoints": expired}
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Exception during checkpoint retention: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _delete_orphan_writes(self):
+        await self.saver.conn.execute(
+            """
+            DELETE FROM writes WHERE NOT EXISTS (
+                SELECT 1 FROM checkpoints c
+                WHERE c.thread_id = writes.thread_id
+                  AND c.checkpoint_ns = writes.checkpoint_ns
+                  AND c.checkpoint_id = writes.checkpoint_id
+            )
+            """
+        )
+
+    @staticmethod
+    def _file_size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
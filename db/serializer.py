@@ -0,0 +1,65 @@
+from typing import Any
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+import zlib
+
+
+# Preset dictionary of byte strings that recur in every serialized State
+# (message classes, message fields, State channels). Blobs written with it can
+# only be read back with the exact same bytes, so any change needs a new tag.
+_DICTIONARY_TAG = "zlib-d1"
+_DICTIONARY = b"".join([
+    b"__start__", b"__end__", b"branch:to:", b"channel_values", b"channel_versions",
+    b"versions_seen", b"updated_channels", b"pending_sends", b"checkpoint_ns",
+    b"finish_reason", b"system_fingerprint", b"logprobs", b"model_name", b"gpt-4o-mini",
+    b"token_usage", b"prompt_tokens", b"completion_tokens", b"total_tokens",
+    b"input_tokens", b"output_tokens", b"input_token_details", b"output_token_details",
+    b"cache_read", b"reasoning", b"audio", b"service_tier", b"default",
+    b"schema", b"Subtask", b"SubtaskOutput", b"task", b"assigned_to", b"requires_side_effects",
+    b"depends_on", b"researcher", b"executor", b"summarizer", b"evaluator", b"result", b"index",
+    b"plan", b"subtasks", b"next_subtask_index", b"subtask_message_start", b"subtask_results",
+    b"subtask_outputs", b"active_subtask_index", b"side_effects_requested", b"side_effects_approved",
+    b"user_side_effects_confirmed", b"replan_needed", b"final_answer", b"success_criteria",
+    b"feedback_on_work", b"success_criteria_met", b"user_input_needed", b"clarifier", b"planner",
+    b"langchain_core.messages.tool", b"ToolMessage", b"tool_call_id", b"artifact", b"status", b"success",
+    b"langchain_core.messages.system", b"SystemMessage",
+    b"langchain_core.messages.human", b"HumanMessage",
+    b"tool_call", b"args", b"query", b"search", b"wikipedia", b"navigate_browser",
+    b"extract_text", b"call_", b"run-", b"lc_run--",
+    b"langchain_core.messages.ai", b"AIMessage",
+    b"content", b"additional_kwargs", b"response_metadata", b"type", b"name", b"id",
+    b"example", b"tool_calls", b"invalid_tool_calls", b"usage_metadata", b"messages",
+    b"model_validate_json",
+])
+
+
+class CompressedSerializer(SerializerProtocol):
+    """
+    Checkpoint serializer that zlib-compresses the blobs produced by another
+    serializer (JsonPlus by default), using a preset dictionary tuned to the
+    State so that even small checkpoints shrink.
+
+    Compressed blobs are tagged `"<type>+zlib-d1"`; anything else is handed to
+    the wrapped serializer as is, so databases written without compression stay
+    readable.
+    """
+
+    def __init__(self, serde: SerializerProtocol = JsonPlusSerializer(), level: int = 6, min_size: int = 128):
+        self.serde = serde
+        self.level = level
+        self.min_size = min_size
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        typ, data = self.serde.dumps_typed(obj)
+        if len(data) < self.min_size:
+            return typ, data
+        compressor = zlib.compressobj(self.level, zdict=_DICTIONARY)
+        return f"{typ}+{_DICTIONARY_TAG}", compressor.compress(data) + compressor.flush()
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        typ, blob = data
+        base, _, codec = typ.rpartition("+")
+        if codec != _DICTIONARY_TAG:
+            return self.serde.loads_typed(data)
+        decompressor = zlib.decompressobj(zdict=_DICTIONARY)
+        return self.serde.loads_typed((base, decompressor.decompress(blob) + decompressor.flush()))
@@ -1,9 +1,20 @@
-import aiosqlite
+from typing import Optional
+from langgraph.checkpoint.serde.base import SerializerProtocol
 from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from db.serializer import CompressedSerializer
+from os import getenv
+import aiosqlite
+
+
+MEMORY_DB_PATH = "db/memory.db"
 
 
-async def setup_memory(db_path: str = "db/memory.db") -> AsyncSqliteSaver:
+async def setup_memory(db_path: str = MEMORY_DB_PATH, serde: Optional[SerializerProtocol] = None) -> AsyncSqliteSaver:
     conn = await aiosqlite.connect(db_path)
+    # Only takes effect on a new database; retention can convert older ones
+    await conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
     await conn.execute("PRAGMA journal_mode=WAL;")
     await conn.commit()
-    return AsyncSqliteSaver(conn)
+    if serde is None and getenv("CHECKPOINT_COMPRESSION", "true").lower() == "true":
+        serde = CompressedSerializer(level=int(getenv("CHECKPOINT_COMPRESSION_LEVEL", "6")))
+    return AsyncSqliteSaver(conn, serde=serde)
@@ -0,0 +1,125 @@
+from sidekick import Sidekick, shutdown_runtime
+from typing import Optional
+from collections import deque
+import asyncio
+
+
+class SidekickPool:
+    """
+    Background-maintained pool of ready-to-use Sidekick sessions.
+
+    `acquire` hands out a warm session immediately when one is available and
+    schedules replenishment, so the cold-start cost (tools, browser context,
+    runtime) stays off the request path. `start` warms `min_size` sessions
+    before the first request. The pool grows towards `max_size` while demand
+    outpaces it, and shrinks back towards `min_size` by one session after
+    every `decay_after` consecutive hits.
+    """
+
+    def __init__(self, min_size: int = 2, max_size: int = 8, decay_after: int = 10):
+        if min_size < 0 or max_size < max(min_size, 1):
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.decay_after = decay_after
+        self.target_size = min_size
+        self._streak = 0
+        self._ready: deque[Sidekick] = deque()
+        self._warming = 0
+        self._tasks: set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+
+    async def start(self):
+        """Warms the pool to `min_size` on the running loop, the one sessions will be served from."""
+        if self._closed:
+            raise RuntimeError("Sidekick pool is closed")
+        self._loop = asyncio.get_running_loop()
+        self._replenish()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def acquire(self) -> Sidekick:
+        if self._closed:
+            raise RuntimeError("Sidekick pool is closed")
+        self._loop = asyncio.get_running_loop()
+
+        if self._ready:
+            sidekick = self._ready.popleft()
+            self.hits += 1
+            self._streak += 1
+            if self._streak >= self.decay_after:
+                # Demand has fallen back: stop keeping the extra sessions warm
+                self.target_size = max(self.target_size - 1, self.min_size)
+                self._streak = 0
+        else:
+            self.misses += 1
+            self._streak = 0
+            self.target_size = min(self.target_size + 1, self.max_size)
+            sidekick = None
+
+        self._replenish()
+
+        if sidekick is None:
+            sidekick = await self._create()
+        return sidekick
+
+    def stats(self) -> dict:
+        return {
+            "ready": len(self._ready),
+            "warming": self._warming,
+            "target_size": self.target_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    async def drain(self):
+        self._closed = True
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        while self._ready:
+            sidekick = self._ready.popleft()
+            try:
+                await sidekick.cleanup()
+            except Exception as e:
+                print(f"Exception draining pooled sidekick: {e}")
+
+    async def shutdown(self):
+        await self.drain()
+        await shutdown_runtime()
+
+    def close(self, timeout: float = 30.0):
+        """Shut down from another thread, on the event loop the pool was used from."""
+        if self._loop is None or self._loop.is_closed() or not self._loop.is_running():
+            return
+        asyncio.run_coroutine_threadsafe(self.shutdown(), self._loop).result(timeout)
+
+    def _replenish(self):
+        missing = self.target_size - len(self._ready) - self._warming
+        for _ in range(max(missing, 0)):
+            self._warming += 1
+            task = asyncio.create_task(self._warm())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _warm(self):
+        try:
+            sidekick = await self._create()
+        except Exception as e:
+            print(f"Exception warming sidekick: {e}")
+            return
+        finally:
+            self._warming -= 1
+
+        if self._closed or len(self._ready) >= self.max_size:
+            await sidekick.cleanup()
+            return
+        self._ready.append(sidekick)
+
+    @staticmethod
+    async def _create() -> Sidekick:
+        sidekick = Sidekick()
+        await sidekick.setup()
+        return sidekick
@@ -26,6 +26,30 @@ class Subtask(BaseModel):
         "evaluator"
     ]
     requires_side_effects: bool = False
+    depends_on: Optional[list[int]] = Field(
+        default=None,
+        description=(
+            "Zero-based indices of EARLIER subtasks whose results this subtask needs. "
+            "Use an empty list for a subtask that is fully independent of the others; "
+            "consecutive independent researcher subtasks are executed CONCURRENTLY. "
+            "Omit (null) to depend on every earlier subtask."
+        )
+    )
+
+
+class SubtaskOutput(BaseModel):
+    index: int
+    result: str
+
+
+def merge_subtask_outputs(
+    left: Optional[list[SubtaskOutput]],
+    right: Optional[list[SubtaskOutput]]
+) -> list[SubtaskOutput]:
+    # None resets the buffer once the join step has consumed it
+    if right is None:
+        return []
+    return (left or []) + right
 
 
 class State(BaseModel):
@@ -37,7 +61,10 @@ class State(BaseModel):
     plan: Optional[str] = None
     subtasks: Optional[list[Subtask]] = None
     next_subtask_index: int = 0
+    subtask_message_start: int = 0
     subtask_results: list[str] = Field(default_factory=list)
+    subtask_outputs: Annotated[list[SubtaskOutput], merge_subtask_outputs] = Field(default_factory=list)
+    active_subtask_index: Optional[int] = None
     side_effects_requested: bool = False
     side_effects_approved: bool = False
     user_side_effects_confirmed: bool = False
@@ -102,7 +129,8 @@ ResearcherToolName = Literal[
     "extract_text",
     "extract_hyperlinks",
     "get_elements",
-    "current_webpage"
+    "current_webpage",
+    "lookup"
 ]
 
 
@@ -115,7 +143,8 @@ ExecutorToolName = Literal[
     "read_file",
     "write_file",
     "list_directory",
-    "send_whatsapp"
+    "send_whatsapp",
+    "lookup"
 ]
 
 
@@ -1,81 +1,214 @@
 from schema import ExecutorToolInference, PlannerOutput, State, EvaluatorOutput, ClarifierOutput, FinalizerOutput, ResearcherToolInference
 from langgraph.graph import StateGraph, START, END
-from langgraph.types import Interrupt
-from langgraph.prebuilt import ToolNode
+from langgraph.types import Interrupt, Send
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.language_models import BaseChatModel
 from tools.file_code import file_code_tools
-from tools.navigation import playwright_tools
+from tools.navigation import playwright_tools, browser_manager
 from tools.search import search_tools
+from tools.cache import tool_cache
+from tools.concurrency import BoundedToolNode, tool_runner
+from tools.extraction import page_cache
+from tools.index import lookup_tool, output_index, format_chunks
 from tools.notifications import whatsapp_tool
 from agents.clarifier import clarifier_agent
 from agents.planner import planner_agent
-from agents.researcher import researcher_agent
+from agents.researcher import researcher_agent, research_subtask_agent
 from agents.summarizer import summarizer_agent
 from agents.executor import executor_agent
 from agents.evaluator import evaluator_agent
 from agents.finalizer import finalizer_agent
-from db.sql_memory import setup_memory
-from utils.utils import infer_tool_calls
-import uuid
+from db.sql_memory import setup_memory, MEMORY_DB_PATH
+from db.retention import CheckpointRetention
+from db.checkpoint_cache import CachedCheckpointSaver
+from utils.utils import SHARED_TOOLS, infer_tool_calls
+from utils.tracing import tracer, tracing_callback, count_llm_retry
+from utils.recording import recorder_for
+from utils.streaming import AnswerStream, describe_task
+from utils.fast_paths import fast_paths
+from utils.response_cache import response_cache
+from typing import Optional
+from os import getenv
 import asyncio
+import openai
+import uuid
 
 
-class Sidekick:
-    def __init__(self):
+class SidekickRuntime:
+    """
+    Process-wide graph, checkpointer and LLM clients shared by every session.
+
+    Nothing in the graph topology is per-user: sessions only contribute a
+    thread id and their own tool bindings, passed in through the run config.
+    """
+
+    def __init__(self, model: str = "gpt-4o-mini", db_path: str = MEMORY_DB_PATH):
+        self.model = model
+        self.db_path = db_path
+        self.llm = None
         self.clarifier_llm_with_output = None
         self.planner_llm_with_output = None
-        self.researcher_llm_with_tools = None
         self.summarizer_llm = None
-        self.executor_llm_with_tools = None
+        # Results above the threshold (in tokens) are summarized map-reduce style
+        self.summarizer_map_threshold = int(getenv("SUMMARIZER_MAP_THRESHOLD", "8000"))
+        self.summarizer_chunk_tokens = int(getenv("SUMMARIZER_CHUNK_TOKENS", "3000"))
+        self.summarizer_concurrency = max(1, int(getenv("SUMMARIZER_CONCURRENCY", "8")))
         self.evaluator_llm_with_output = None
         self.finalizer_llm_with_output = None
-        self.researcher_tools = None
-        self.executor_tools = None
         self.graph = None
-        self.sidekick_id = str(uuid.uuid4())
+        self.saver = None
         self.memory = None
-        self.browser = None
-        self.playwright = None
-
-    async def setup(self):
-        self.memory = await setup_memory()
-        self.researcher_tools, self.browser, self.playwright = await playwright_tools()
-        self.researcher_tools += await search_tools()
-        self.executor_tools = await file_code_tools()
-        self.executor_tools.append(whatsapp_tool)
-        self.clarifier_llm_with_output = ChatOpenAI(model="gpt-4o-mini").with_structured_output(ClarifierOutput, method="function_calling")
-        self.planner_llm_with_output = ChatOpenAI(model="gpt-4o-mini").with_structured_output(PlannerOutput, method="function_calling")
-        self.researcher_llm_with_tools = ChatOpenAI(model="gpt-4o-mini").bind_tools(self.researcher_tools)
-        self.executor_llm_with_tools = ChatOpenAI(model="gpt-4o-mini").bind_tools(self.executor_tools)
-        self.summarizer_llm = ChatOpenAI(model="gpt-4o-mini")
-        self.evaluator_llm_with_output = ChatOpenAI(model="gpt-4o-mini").with_structured_output(EvaluatorOutput)
-        self.finalizer_llm_with_output = ChatOpenAI(model="gpt-4o-mini").with_structured_output(FinalizerOutput)
+        self.retention = None
+
+    async def setup(self, llm: Optional[BaseChatModel] = None):
+        self.saver = await setup_memory(self.db_path)
+        # Hot threads read their latest checkpoint from memory; writes are batched behind it
+        self.memory = (
+            CachedCheckpointSaver(
+                self.saver,
+                max_threads=int(getenv("CHECKPOINT_CACHE_THREADS", "256")),
+                flush_interval=float(getenv("CHECKPOINT_FLUSH_INTERVAL", "0.05"))
+            )
+            if getenv("CHECKPOINT_CACHE", "true").lower() == "true"
+            else self.saver
+        )
+        if isinstance(self.memory, CachedCheckpointSaver):
+            tracer.register_stats("checkpoint_cache", self.memory.stats)
+        self.retention = CheckpointRetention(
+            self.saver,
+            self.db_path,
+            keep_last=int(getenv("CHECKPOINT_KEEP_LAST", "20")),
+            thread_ttl=float(getenv("CHECKPOINT_THREAD_TTL", str(7 * 86400))),
+            interval=float(getenv("CHECKPOINT_RETENTION_INTERVAL", "600"))
+        )
+        self.retention.start()
+        tracer.register_stats("checkpoint_retention", self.retention.report)
+        # Sampled on this loop, which owns the browser
+        tracer.register_stats("browser", browser_manager.memory_report, loop=asyncio.get_running_loop())
+        tracer.register_stats("tool_cache", tool_cache.stats)
+        tracer.register_stats("output_index", output_index.stats)
+        tracer.register_stats("fast_paths", fast_paths.stats)
+        # One client (and HTTP connection pool) backs every agent and session
+        self.llm = llm or ChatOpenAI(
+            model=self.model,
+            # The client retries transient failures; the hook counts those retries per node
+            http_async_client=openai.DefaultAsyncHttpxClient(event_hooks={"request": [count_llm_retry]})
+        )
+        # Opt-in exact-match response cache for the deterministic structured-output agents
+        structured_llm = self.llm.model_copy(update={"cache": response_cache}) if response_cache else self.llm
+        if response_cache:
+            tracer.register_stats("response_cache", response_cache.stats)
+        self.clarifier_llm_with_output = structured_llm.with_structured_output(ClarifierOutput, method="function_calling").with_config(metadata={"agent": "clarifier"})
+        self.planner_llm_with_output = structured_llm.with_structured_output(PlannerOutput, method="function_calling").with_config(metadata={"agent": "planner"})
+        self.summarizer_llm = self.llm.with_config(metadata={"agent": "summarizer"})
+        self.evaluator_llm_with_output = structured_llm.with_structured_output(EvaluatorOutput).with_config(metadata={"agent": "evaluator"})
+        self.finalizer_llm_with_output = structured_llm.with_structured_output(FinalizerOutput).with_config(metadata={"agent": "finalizer"})
         await self.build_graph()
 
-    def clarifier(self, state: State) -> State:
-        return clarifier_agent(self.clarifier_llm_with_output, state)
+    @staticmethod
+    def session(config: RunnableConfig) -> "Sidekick":
+        return config["configurable"]["session"]
+
+    async def clarifier(self, state: State) -> State:
+        updates = fast_paths.decide("clarifier", state)
+        if updates is not None:
+            return updates
+        return await clarifier_agent(self.clarifier_llm_with_output, state)
 
     def wait_for_user(self, state: State):
         return Interrupt("waiting_for_user")
 
-    def planner(self, state: State) -> State:
-        return planner_agent(self.planner_llm_with_output, state)
+    async def planner(self, state: State) -> State:
+        return await planner_agent(self.planner_llm_with_output, state)
 
-    def researcher(self, state: State) -> State:
-        return researcher_agent(self.researcher_llm_with_tools, state)
+    async def researcher(self, state: State, config: RunnableConfig) -> State:
+        return await researcher_agent(self.session(config).researcher_llm_with_tools, state)
 
-    def summarizer(self, state: State) -> State:
-        return summarizer_agent(self.summarizer_llm, state)
+    async def researcher_tools(self, state: State, config: RunnableConfig) -> State:
+        return await self.session(config).researcher_tool_node.ainvoke(state, config)
 
-    def executor(self, state: State) -> State:
-        return executor_agent(self.executor_llm_with_tools, state)
+    async def research_worker(self, state: State, config: RunnableConfig) -> State:
+        session = self.session(config)
+        return await research_subtask_agent(
+            session.researcher_llm_with_tools,
+            session.researcher_tool_node,
+            state,
+            state.active_subtask_index,
+            config
+        )
 
-    def evaluator(self, state: State) -> State:
-        return evaluator_agent(self.evaluator_llm_with_output, state)
+    def research_join(self, state: State) -> State:
+        outputs = sorted(state.subtask_outputs, key=lambda o: o.index)
+        return {
+            "subtask_results": state.subtask_results + [o.result for o in outputs],
+            "next_subtask_index": state.next_subtask_index + len(outputs),
+            "subtask_message_start": len(state.messages),
+            "subtask_outputs": None
+        }
+
+    async def summarizer(self, state: State, config: RunnableConfig) -> State:
+        # Stored tool outputs relevant to the task, which the results only summarize
+        task = state.subtasks[state.next_subtask_index].task
+        thread_id = config["configurable"]["thread_id"]
+        excerpts = format_chunks(await asyncio.to_thread(output_index.search, thread_id, task, None, 6))
+        return await summarizer_agent(
+            self.summarizer_llm,
+            state,
+            excerpts,
+            map_threshold=self.summarizer_map_threshold,
+            chunk_tokens=self.summarizer_chunk_tokens,
+            max_concurrency=self.summarizer_concurrency
+        )
 
-    def finalizer(self, state: State) -> State:
-        return finalizer_agent(self.finalizer_llm_with_output, state)
+    async def executor(self, state: State, config: RunnableConfig) -> State:
+        return await executor_agent(self.session(config).executor_llm_with_tools, state)
+
+    async def executor_tools(self, state: State, config: RunnableConfig) -> State:
+        return await self.session(config).executor_tool_node.ainvoke(state, config)
+
+    async def evaluator(self, state: State) -> State:
+        updates = fast_paths.decide("evaluator", state)
+        if updates is not None:
+            return updates
+        return await evaluator_agent(self.evaluator_llm_with_output, state)
+
+    async def finalizer(self, state: State) -> State:
+        updates = fast_paths.decide("finalizer", state)
+        if updates is None:
+            updates = await finalizer_agent(self.finalizer_llm_with_output, state)
+        # The run is over: a side effect still pending approval must not carry into the next turn
+        return {**updates, "side_effects_requested": False, "side_effects_approved": False, "user_side_effects_confirmed": False}
+
+    @staticmethod
+    def parallel_research_batch(state: State) -> list[int]:
+        """
+        Indices of consecutive researcher subtasks, starting at the next one,
+        whose dependencies are all already completed and can run concurrently.
+        """
+        start = state.next_subtask_index
+        batch = []
+        for index in range(start, len(state.subtasks or [])):
+            subtask = state.subtasks[index]
+            if subtask.assigned_to != "researcher":
+                break
+            depends_on = range(index) if subtask.depends_on is None else subtask.depends_on
+            if index > start and any(d >= start for d in depends_on):
+                break
+            batch.append(index)
+        return batch
+
+    def dispatch_subtask(self, state: State) -> str | list[Send]:
+        next_task = state.subtasks[state.next_subtask_index]
+        if next_task.assigned_to == "researcher":
+            batch = self.parallel_research_batch(state)
+            if len(batch) > 1:
+                return [
+                    Send("research_worker", state.model_copy(update={"active_subtask_index": index}))
+                    for index in batch
+                ]
+        return next_task.assigned_to
 
     def clarifier_router(self, state: State) -> str:
         if state.user_input_needed:
@@ -87,8 +220,7 @@ class Sidekick:
     def planner_router(self, state: State) -> str:
         if not state.subtasks:
             return "evaluator"
-        next_task = state.subtasks[0]
-        return next_task.assigned_to
+        return self.dispatch_subtask(state)
 
     def researcher_router(self, state: State) -> str:
 
@@ -116,8 +248,8 @@ class Sidekick:
                 else:
                     return "researcher"
 
-        # 5. Otherwise keep researching
-        return "researcher"
+        # 5. Otherwise start the next research subtask(s)
+        return self.dispatch_subtask(state)
 
     def summarizer_router(self, state: State) -> str:
         # 1. No plan yet
@@ -132,7 +264,7 @@ class Sidekick:
 
         # 3. Task not for researcher → hand off
         if next_task.assigned_to != "summarizer":
-            return next_task.assigned_to
+            return self.dispatch_subtask(state)
 
         return "summarizer"
 
@@ -150,7 +282,7 @@ class Sidekick:
 
         # 3. Task not for researcher → hand off
         if next_task.assigned_to != "executor":
-            return next_task.assigned_to
+            return self.dispatch_subtask(state)
 
         if state.side_effects_requested and not state.side_effects_approved:
             return "evaluator"
@@ -159,19 +291,28 @@ class Sidekick:
             last = state.messages[-1]
             tools = infer_tool_calls(last)
             if tools:
-                if all(isinstance(t, ExecutorToolInference) for t in tools):
+                if all(isinstance(t, ExecutorToolInference) or t.tool_name in SHARED_TOOLS for t in tools):
                     return "executor_tools"
                 else:
                     return "executor"
 
         return "executor"
 
+    def research_join_router(self, state: State) -> str:
+        if state.next_subtask_index >= len(state.subtasks):
+            return "evaluator"
+        return self.dispatch_subtask(state)
+
     def evaluator_router(self, state: State) -> str:
         if state.user_input_needed:
             return "clarifier"
 
+        # Side effects refused and nothing to ask the user: the executor can't go on as planned
+        if state.side_effects_requested and not state.side_effects_approved:
+            return "planner" if state.replan_needed else "finalizer"
+
         if state.next_subtask_index < len(state.subtasks):
-            return state.subtasks[state.next_subtask_index].assigned_to
+            return self.dispatch_subtask(state)
 
         if not state.success_criteria_met:
             if state.replan_needed:
@@ -185,17 +326,19 @@ class Sidekick:
         # Set up Graph Builder with State
         graph_builder = StateGraph(State)
 
-        # Add nodes
-        graph_builder.add_node("clarifier", self.clarifier)
-        graph_builder.add_node("wait_for_user", self.wait_for_user)
-        graph_builder.add_node("planner", self.planner)
-        graph_builder.add_node("researcher", self.researcher)
-        graph_builder.add_node("summarizer", self.summarizer)
-        graph_builder.add_node("executor", self.executor)
-        graph_builder.add_node("evaluator", self.evaluator)
-        graph_builder.add_node("finalizer", self.finalizer)
-        graph_builder.add_node("researcher_tools", ToolNode(tools=self.researcher_tools))
-        graph_builder.add_node("executor_tools", ToolNode(tools=self.executor_tools))
+        # Add nodes, each wrapped in a tracing span
+        graph_builder.add_node("clarifier", tracer.wrap_node("clarifier", self.clarifier))
+        graph_builder.add_node("wait_for_user", tracer.wrap_node("wait_for_user", self.wait_for_user))
+        graph_builder.add_node("planner", tracer.wrap_node("planner", self.planner))
+        graph_builder.add_node("researcher", tracer.wrap_node("researcher", self.researcher))
+        graph_builder.add_node("research_worker", tracer.wrap_node("research_worker", self.research_worker))
+        graph_builder.add_node("research_join", tracer.wrap_node("research_join", self.research_join))
+        graph_builder.add_node("summarizer", tracer.wrap_node("summarizer", self.summarizer))
+        graph_builder.add_node("executor", tracer.wrap_node("executor", self.executor))
+        graph_builder.add_node("evaluator", tracer.wrap_node("evaluator", self.evaluator))
+        graph_builder.add_node("finalizer", tracer.wrap_node("finalizer", self.finalizer))
+        graph_builder.add_node("researcher_tools", tracer.wrap_node("researcher_tools", self.researcher_tools))
+        graph_builder.add_node("executor_tools", tracer.wrap_node("executor_tools", self.executor_tools))
 
         # Add edges
         graph_builder.add_edge(START, "clarifier")
@@ -268,6 +411,17 @@ class Sidekick:
                 "finalizer": "finalizer"
             }
         )
+        graph_builder.add_conditional_edges(
+            "research_join",
+            self.research_join_router,
+            {
+                "researcher": "researcher",
+                "executor": "executor",
+                "summarizer": "summarizer",
+                "evaluator": "evaluator"
+            }
+        )
+        graph_builder.add_edge("research_worker", "research_join")
         graph_builder.add_edge("researcher_tools", "researcher")
         graph_builder.add_edge("executor_tools", "executor")
         graph_builder.add_edge("finalizer", END)
@@ -275,20 +429,190 @@ class Sidekick:
         # Compile the graph
         self.graph = graph_builder.compile(checkpointer=self.memory)
 
+    async def shutdown(self):
+        if self.retention:
+            tracer.unregister_stats("checkpoint_retention")
+            await self.retention.stop()
+        tracer.unregister_stats("browser")
+        await browser_manager.shutdown()
+        tracer.unregister_stats("tool_cache")
+        tool_cache.close()
+        page_cache.close()
+        tracer.unregister_stats("output_index")
+        output_index.close()
+        tracer.unregister_stats("fast_paths")
+        tool_runner.close()
+        if response_cache:
+            tracer.unregister_stats("response_cache")
+            response_cache.close()
+        if isinstance(self.memory, CachedCheckpointSaver):
+            tracer.unregister_stats("checkpoint_cache")
+            await self.memory.close()
+        if self.saver:
+            await self.saver.conn.close()
+
+    async def flush_checkpoints(self):
+        if isinstance(self.memory, CachedCheckpointSaver):
+            await self.memory.flush()
+
+
+_runtime: Optional[SidekickRuntime] = None
+_runtime_lock = asyncio.Lock()
+
+
+async def get_runtime() -> SidekickRuntime:
+    global _runtime
+    async with _runtime_lock:
+        if _runtime is None:
+            runtime = SidekickRuntime()
+            await runtime.setup()
+            _runtime = runtime
+        return _runtime
+
+
+async def shutdown_runtime():
+    global _runtime
+    async with _runtime_lock:
+        if _runtime is not None:
+            await _runtime.shutdown()
+            _runtime = None
+
+
+class Sidekick:
+    def __init__(self):
+        self.runtime = None
+        self.researcher_llm_with_tools = None
+        self.executor_llm_with_tools = None
+        self.researcher_tools = None
+        self.executor_tools = None
+        self.researcher_tool_node = None
+        self.executor_tool_node = None
+        self.graph = None
+        self.sidekick_id = str(uuid.uuid4())
+        # Set SIDEKICK_RECORD_DIR to capture the thread for benchmarks/replay.py
+        self.recorder = recorder_for(self.sidekick_id)
+
+    async def setup(self):
+        runtime = await get_runtime()
+        researcher_tools = await playwright_tools(self.sidekick_id)
+        researcher_tools += await search_tools()
+        executor_tools = await file_code_tools()
+        executor_tools.append(whatsapp_tool)
+        # Large tool outputs are kept out of the messages; both agents can search them
+        researcher_tools.append(lookup_tool(self.sidekick_id))
+        executor_tools.append(lookup_tool(self.sidekick_id))
+        self.bind(runtime, researcher_tools, executor_tools)
+
+    def bind(self, runtime: SidekickRuntime, researcher_tools: list, executor_tools: list):
+        self.runtime = runtime
+        self.researcher_tools = researcher_tools
+        self.executor_tools = executor_tools
+        self.researcher_llm_with_tools = runtime.llm.bind_tools(researcher_tools).with_config(metadata={"agent": "researcher"})
+        self.executor_llm_with_tools = runtime.llm.bind_tools(executor_tools).with_config(metadata={"agent": "executor"})
+        # Tool call batches run concurrently, blocking tools on a bounded pool with per-tool limits
+        offload_chars = int(getenv("TOOL_OFFLOAD_CHARS", "4000"))
+        self.researcher_tool_node = BoundedToolNode(researcher_tools, index=output_index, offload_chars=offload_chars)
+        self.executor_tool_node = BoundedToolNode(executor_tools, index=output_index, offload_chars=offload_chars)
+        self.graph = runtime.graph
+
+    def config(self) -> RunnableConfig:
+        callbacks = [tracing_callback] + ([self.recorder] if self.recorder else [])
+        return {"configurable": {"thread_id": self.sidekick_id, "session": self}, "callbacks": callbacks}
+
     async def run_superstep(self, message, history):
-        config = {"configurable": {"thread_id": self.sidekick_id}}
+        config = self.config()
 
         if isinstance(message, str):
             message = HumanMessage(content=message)
 
+        if self.recorder:
+            self.recorder.record_turn(message.content)
+
         # Invoke graph with ONLY the new message
-        result = await self.graph.ainvoke(
-            {"messages": [message]},
-            config=config,
-        )
+        with tracer.span("run_superstep", kind="run", thread_id=self.sidekick_id):
+            try:
+                result = await self.graph.ainvoke(
+                    {"messages": [message]},
+                    config=config,
+                )
+            finally:
+                # The run ended (END or interrupt): make its checkpoints durable
+                await self.runtime.flush_checkpoints()
+
+        # True if graph paused for user input or permission
+        user_input_needed = "__interrupt__" in result
+
+        return self.turn_history(history, message, result), user_input_needed
 
+    async def stream_superstep(self, message, history):
+        """
+        Runs the same turn as `run_superstep`, yielding `(history, user_input_needed)`
+        as it goes: a progress line for every node at work, then the finalizer's
+        answer as its tokens arrive, and last the history `run_superstep` returns.
+        """
+        config = self.config()
+
+        if isinstance(message, str):
+            message = HumanMessage(content=message)
+
+        if self.recorder:
+            self.recorder.record_turn(message.content)
+
+        turn = [{"role": "user", "content": message.content}]
+        events: asyncio.Queue = asyncio.Queue()
+
+        # The graph runs in its own task, so the run span and the node spans keep
+        # their context however the caller drives this generator
+        async def run():
+            with tracer.span("run_superstep", kind="run", thread_id=self.sidekick_id, streaming=True):
+                try:
+                    async for event in self.graph.astream(
+                        {"messages": [message]},
+                        config=config,
+                        stream_mode=["values", "updates", "tasks", "messages"],
+                    ):
+                        events.put_nowait(event)
+                finally:
+                    await self.runtime.flush_checkpoints()
+                    events.put_nowait(None)
+
+        task = asyncio.create_task(run())
+        result, user_input_needed = {}, False
+        running: dict[str, str] = {}
+        answer = AnswerStream()
+        try:
+            while (event := await events.get()) is not None:
+                mode, chunk = event
+                if mode == "values":
+                    result = chunk
+                elif mode == "updates":
+                    user_input_needed = user_input_needed or "__interrupt__" in chunk
+                elif mode == "tasks":
+                    if "input" in chunk:
+                        progress = describe_task(chunk["name"], chunk["input"])
+                        if progress:
+                            running[chunk["id"]] = progress
+                    else:
+                        running.pop(chunk["id"], None)
+                    if running and not answer.text:
+                        yield history + turn + [{"role": "assistant", "content": "\n".join(running.values())}], False
+                elif mode == "messages":
+                    token, metadata = chunk
+                    if metadata.get("langgraph_node") == "finalizer" and answer.feed(token):
+                        yield history + turn + [{"role": "assistant", "content": answer.text}], False
+            # Re-raises whatever stopped the graph
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+        yield self.turn_history(history, message, result), user_input_needed
+
+    @staticmethod
+    def turn_history(history, message, result):
         last_ai = next(
-            (m for m in reversed(result["messages"]) if isinstance(m, AIMessage)),
+            (m for m in reversed(result.get("messages", [])) if isinstance(m, AIMessage)),
             None,
         )
 
@@ -298,22 +622,7 @@ class Sidekick:
                 {"role": "assistant", "content": last_ai.content},
             ]
 
-        # True if graph paused for user input or permission
-        user_input_needed = "__interrupt__" in result
-
-        return history, user_input_needed
+        return history
 
     async def cleanup(self):
-        if self.browser:
-            try:
-                loop = asyncio.get_running_loop()
-                loop.create_task(self.browser.close())
-                if self.playwright:
-                    loop.create_task(self.playwright.stop())
-            except RuntimeError:
-                # If no loop is running, do a direct run
-                asyncio.run(self.browser.close())
-                if self.playwright:
-                    asyncio.run(self.playwright.stop())
-        if self.memory and hasattr(self.memory, "conn"):
-            await self.memory.conn.close()
+        await browser_manager.release(self.sidekick_id)
@@ -0,0 +1,120 @@
+from os import getenv
+from typing import Callable, Optional
+import sqlite3
+import threading
+import time
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(str(query).lower().split())
+
+
+class ToolResultCache:
+    """
+    TTL-based, size-bounded SQLite cache for tool results, keyed on the tool
+    namespace and the normalized query.
+
+    Tools wrapped with `wrap` are sync and may run on worker threads, so all
+    access goes through one connection guarded by a lock.
+    """
+
+    def __init__(self, db_path: str = "db/tool_cache.db", ttl_seconds: float = 86400.0, max_entries: int = 5000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL;")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS tool_cache (
+                    namespace TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, query)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS tool_cache_accessed ON tool_cache (accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, namespace: str, query: str) -> Optional[str]:
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT result, created_at FROM tool_cache WHERE namespace = ? AND query = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    conn.execute("DELETE FROM tool_cache WHERE namespace = ? AND query = ?", (namespace, key))
+                    conn.commit()
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE tool_cache SET accessed_at = ? WHERE namespace = ? AND query = ?",
+                (now, namespace, key)
+            )
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, namespace: str, query: str, result: str):
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO tool_cache (namespace, query, result, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, result, now, now)
+            )
+            conn.execute("DELETE FROM tool_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            # Least recently used entries go first once the cache is full
+            conn.execute("""
+                DELETE FROM tool_cache WHERE rowid IN (
+                    SELECT rowid FROM tool_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            conn.commit()
+
+    def wrap(self, namespace: str, func: Callable[[str], str]) -> Callable[[str], str]:
+        def cached(query: str) -> str:
+            result = self.get(namespace, query)
+            if result is None:
+                result = func(query)
+                self.set(namespace, query, result)
+            return result
+        return cached
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._connection().execute("SELECT COUNT(*) FROM tool_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+tool_cache = ToolResultCache(
+    db_path=getenv("TOOL_CACHE_PATH", "db/tool_cache.db"),
+    ttl_seconds=float(getenv("TOOL_CACHE_TTL", "86400")),
+    max_entries=int(getenv("TOOL_CACHE_MAX_ENTRIES", "5000")),
+)
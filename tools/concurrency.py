@@ -0,0 +1,223 @@
+from os import getenv
+from typing import Any, Awaitable, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.messages import ToolCall, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool, StructuredTool, Tool
+from langgraph.prebuilt import ToolNode
+from tools.index import OutputIndex, offload_stub
+from utils.utils import EXECUTOR_TOOL_SAFETY, ToolSafety
+import asyncio
+import contextvars
+import threading
+
+
+# Calls of one tool in flight at once, across all sessions
+DEFAULT_TOOL_LIMITS = {
+    "search": 8,
+    "wikipedia": 4,
+    "send_whatsapp": 1,
+    # One interpreter and one set of globals shared by every session
+    "Python_REPL": 1,
+}
+
+DEFAULT_TOOL_TIMEOUTS = {
+    "send_whatsapp": 30.0,
+    "Python_REPL": 30.0,
+}
+
+# A timed-out call of these may still have taken effect, so the agent must not retry it
+SIDE_EFFECT_TOOLS = {name for name, safety in EXECUTOR_TOOL_SAFETY.items() if safety != ToolSafety.READ_ONLY}
+
+
+def parse_overrides(spec: Optional[str], cast: Callable[[str], Any]) -> dict[str, Any]:
+    """`name=value,name=value` from an env variable."""
+    overrides = {}
+    for item in (spec or "").split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            overrides[name.strip()] = cast(value.strip())
+    return overrides
+
+
+def is_sync_tool(tool: BaseTool) -> bool:
+    """True when the tool only has a blocking implementation (LangChain would run it on the default executor)."""
+    if isinstance(tool, (StructuredTool, Tool)):
+        return tool.coroutine is None
+    return type(tool)._arun is BaseTool._arun
+
+
+class ToolRunner:
+    """
+    Runs tool calls with a per-tool concurrency limit and a per-call timeout,
+    dispatching blocking tools to a bounded thread pool of their own instead
+    of the event loop's small default executor.
+
+    A timed-out call returns an error ToolMessage so the agent can carry on.
+    A blocking call cannot be interrupted: it keeps its tool's slot (and its
+    worker) until the underlying function returns, so limits hold for calls
+    that outlive their timeout. Timed-out side-effect tools report an unknown
+    outcome instead of inviting a retry.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 16,
+        limits: Optional[dict[str, int]] = None,
+        default_limit: int = 8,
+        timeouts: Optional[dict[str, float]] = None,
+        default_timeout: float = 60.0
+    ):
+        self.max_workers = max_workers
+        self.limits = {**DEFAULT_TOOL_LIMITS, **(limits or {})}
+        self.default_limit = default_limit
+        self.timeouts = {**DEFAULT_TOOL_TIMEOUTS, **(timeouts or {})}
+        self.default_timeout = default_timeout
+        self.calls = 0
+        self.threaded = 0
+        self.timed_out = 0
+        self.waited = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sidekick-tool")
+            return self._executor
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Semaphores belong to the loop they were first awaited on
+            self._loop = loop
+            self._semaphores = {}
+        if name not in self._semaphores:
+            self._semaphores[name] = asyncio.Semaphore(self.limits.get(name, self.default_limit))
+        return self._semaphores[name]
+
+    def timeout_for(self, name: str) -> float:
+        return self.timeouts.get(name, self.default_timeout)
+
+    async def in_thread(self, func: Callable, *args) -> Any:
+        """Runs `func` on the tool pool, keeping the caller's context (run config, tracing span)."""
+        self.threaded += 1
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self._pool(), context.run, func, *args)
+
+    async def run(self, call: ToolCall, work: Callable[[], Awaitable[ToolMessage]], blocking: bool = False) -> ToolMessage:
+        name = call["name"]
+        semaphore = self._semaphore(name)
+        if semaphore.locked():
+            self.waited += 1
+        await semaphore.acquire()
+        self.calls += 1
+        timeout = self.timeout_for(name)
+        task = asyncio.ensure_future(work())
+
+        def finished(task: asyncio.Future):
+            # The slot is freed when the work is really over, not when we stop waiting for it
+            semaphore.release()
+            if not task.cancelled():
+                task.exception()
+
+        task.add_done_callback(finished)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            if not blocking:
+                task.cancel()
+            if name in SIDE_EFFECT_TOOLS:
+                content = (
+                    f"Error: {name} did not finish within {timeout:g}s and may still complete. "
+                    "Its outcome is unknown: do not call it again; report this to the user."
+                )
+            else:
+                content = f"Error: {name} did not finish within {timeout:g}s. Try again or use another approach."
+            return ToolMessage(content=content, name=name, tool_call_id=call["id"], status="error")
+        except asyncio.CancelledError:
+            if not blocking:
+                task.cancel()
+            raise
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "threaded": self.threaded,
+            "timed_out": self.timed_out,
+            "waited_for_limit": self.waited,
+            "max_workers": self.max_workers,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+# Never moved to the index: lookup reads it, extract_text already returns bounded parts
+INLINE_TOOLS = ("lookup", "extract_text")
+
+
+class BoundedToolNode(ToolNode):
+    """
+    ToolNode whose batch of tool calls (already gathered concurrently) runs
+    through a ToolRunner: blocking tools on its thread pool, every call
+    under its tool's limit and timeout.
+
+    With an index, outputs longer than `offload_chars` (except those of
+    `inline_tools`) are stored in the thread's OutputIndex and the message
+    keeps only a handle and a snippet.
+    """
+
+    def __init__(
+        self,
+        tools: list,
+        runner: Optional[ToolRunner] = None,
+        index: Optional[OutputIndex] = None,
+        offload_chars: int = 4000,
+        inline_tools: tuple[str, ...] = INLINE_TOOLS,
+        **kwargs
+    ):
+        super().__init__(tools, **kwargs)
+        self.runner = runner or tool_runner
+        self.index = index
+        self.offload_chars = offload_chars
+        self.inline_tools = set(inline_tools)
+
+    async def _arun_one(self, call: ToolCall, input_type: Any, config: RunnableConfig) -> ToolMessage:
+        tool = self.tools_by_name.get(call["name"])
+        if tool is not None and is_sync_tool(tool):
+            message = await self.runner.run(call, lambda: self.runner.in_thread(self._run_one, call, input_type, config), blocking=True)
+        else:
+            message = await self.runner.run(call, lambda: super(BoundedToolNode, self)._arun_one(call, input_type, config))
+        return await self._offload(message, config)
+
+    async def _offload(self, message: ToolMessage, config: RunnableConfig) -> ToolMessage:
+        thread_id = (config or {}).get("configurable", {}).get("thread_id")
+        if (
+            self.index is None
+            or not thread_id
+            or not isinstance(message, ToolMessage)
+            or message.status == "error"
+            or message.name in self.inline_tools
+            or not isinstance(message.content, str)
+            or len(message.content) <= self.offload_chars
+        ):
+            return message
+        handle, chunks = await asyncio.to_thread(self.index.add, thread_id, message.name, message.content)
+        message.content = offload_stub(handle, chunks, message.content)
+        return message
+
+
+tool_runner = ToolRunner(
+    max_workers=int(getenv("TOOL_WORKERS", "16")),
+    limits=parse_overrides(getenv("TOOL_LIMITS"), int),
+    default_limit=int(getenv("TOOL_DEFAULT_LIMIT", "8")),
+    timeouts=parse_overrides(getenv("TOOL_TIMEOUTS"), float),
+    default_timeout=float(getenv("TOOL_TIMEOUT", "60")),
+)
@@ -0,0 +1,126 @@
+from os import getenv
+from lxml import html as lxml_html
+from lxml.etree import ParserError
+from tools.cache import ToolResultCache
+import hashlib
+
+
+# Never part of the readable content
+DROP_TAGS = ["script", "style", "noscript", "template", "svg", "canvas", "iframe", "form", "button", "select"]
+
+# Page chrome, by tag or by a whole id/class token naming it; kept when it holds the
+# page title, the main content or most of the page's text
+CHROME_TAGS = {"nav", "header", "footer", "aside"}
+CHROME_TOKENS = {
+    "cookie", "cookies", "consent", "cookie-banner", "cookie-consent", "cookie-notice",
+    "nav", "navbar", "navigation", "menu", "main-menu", "main-nav", "site-nav", "breadcrumb", "breadcrumbs",
+    "header", "site-header", "footer", "site-footer", "sidebar", "widget-area",
+    "ad", "ads", "advert", "advertisement", "promo", "share", "sharing", "social", "social-share",
+    "related", "related-posts", "related-stories", "comments", "comment-list",
+    "subscribe", "newsletter", "popup", "modal",
+}
+
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "li", "ul", "ol", "tr", "table", "pre", "blockquote", "h1", "h2", "h3", "h4", "h5", "h6", "dd", "dt", "br", "figcaption"}
+
+MAIN_XPATH = "//main | //article | //*[@role='main']"
+HOLDS_CONTENT_XPATH = ".//h1 | .//main | .//article | .//*[@role='main']"
+
+
+def _is_chrome(element, body_chars: int) -> bool:
+    tokens = f"{element.get('id', '')} {element.get('class', '')}".lower().split()
+    if element.tag not in CHROME_TAGS and not CHROME_TOKENS.intersection(tokens):
+        return False
+    if element.xpath(HOLDS_CONTENT_XPATH):
+        return False
+    return len(element.text_content()) * 2 < body_chars
+
+
+def main_text(html: str) -> str:
+    """
+    Readable main content of an HTML page: page chrome and scripts dropped,
+    one line per block element, duplicate lines removed.
+    """
+    try:
+        tree = lxml_html.fromstring(html)
+    except (ParserError, ValueError):
+        return ""
+
+    for element in tree.xpath("//" + " | //".join(DROP_TAGS)):
+        element.drop_tree()
+    body_chars = len(tree.text_content())
+    for element in list(tree.iter()):
+        if not isinstance(element.tag, str) or element.tag in ("html", "body", "main", "article") or element.getparent() is None:
+            continue
+        if _is_chrome(element, body_chars):
+            element.drop_tree()
+
+    # The largest <main>/<article> when the page has one, else the whole body
+    candidates = tree.xpath(MAIN_XPATH)
+    root = max(candidates, key=lambda e: len(e.text_content())) if candidates else (tree.find("body") if tree.find("body") is not None else tree)
+
+    for element in root.iter():
+        if element.tag in BLOCK_TAGS:
+            element.tail = "\n" + (element.tail or "")
+
+    lines, seen = [], set()
+    for line in root.text_content().splitlines():
+        line = " ".join(line.split())
+        if len(line) > 1 and line not in seen:
+            seen.add(line)
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def chunk_text(text: str, max_chars: int) -> list[str]:
+    """Splits on line boundaries into chunks of at most `max_chars` (longer lines are cut)."""
+    chunks, current = [], ""
+    for line in text.splitlines():
+        while len(line) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:max_chars])
+            line = line[max_chars:]
+        if current and len(current) + 1 + len(line) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks or [""]
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8", "replace")).hexdigest()[:32]
+
+
+class PageTextCache:
+    """
+    Extracted page text on disk, keyed by URL and a hash of the page's HTML.
+
+    `extract(url, html)` only parses when that exact HTML has not been seen
+    before.
+    """
+
+    def __init__(self, cache: ToolResultCache):
+        self.cache = cache
+
+    def extract(self, url: str, html: str) -> str:
+        text = self.cache.get("page_text", f"{_digest(url)}:{_digest(html)}")
+        if text is None:
+            text = main_text(html)
+        self.store(url, html, text)
+        return text
+
+    def store(self, url: str, html: str, text: str):
+        """Records `text`, already extracted from `html`."""
+        self.cache.set("page_text", f"{_digest(url)}:{_digest(html)}", text)
+
+
+page_cache = ToolResultCache(
+    db_path=getenv("PAGE_CACHE_PATH", "db/page_cache.db"),
+    ttl_seconds=float(getenv("PAGE_CACHE_TTL", "3600")),
+    max_entries=int(getenv("PAGE_CACHE_MAX_ENTRIES", "2000")),
+)
+
+page_text_cache = PageTextCache(page_cache)
@@ -0,0 +1,174 @@
+from os import getenv
+from typing import Optional
+from urllib.parse import urlparse
+from playwright.async_api import BrowserContext, Route
+from tools.extraction import main_text, page_text_cache
+import asyncio
+import httpx
+
+
+# The researcher reads text and links only
+HEAVY_RESOURCES = ("image", "media", "font")
+
+AD_AND_ANALYTICS_DOMAINS = (
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "google-analytics.com",
+    "googletagmanager.com", "adservice.google.com", "amazon-adsystem.com", "adnxs.com", "criteo.com",
+    "taboola.com", "outbrain.com", "facebook.net", "scorecardresearch.com", "quantserve.com",
+    "hotjar.com", "segment.io", "mixpanel.com", "nr-data.net", "chartbeat.com", "moatads.com",
+)
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0 Safari/537.36"
+
+
+class StaticPage:
+    """
+    A page fetched over plain HTTP, standing in for a Playwright Page in the
+    tools that only read its HTML (extract_text, extract_hyperlinks,
+    current_webpage). Tools that need a live DOM open it in the browser.
+    """
+
+    def __init__(self, url: str, html: str, status: int):
+        self.url = url
+        self.html = html
+        self.status = status
+        self._closed = False
+
+    async def content(self) -> str:
+        return self.html
+
+    def is_closed(self) -> bool:
+        return self._closed
+
+    async def close(self):
+        self._closed = True
+
+
+class NavigationProfile:
+    """
+    How the researcher loads pages: request interception that aborts heavy
+    resource types and ad/analytics domains in browser contexts, and an
+    HTTP-only fast path for static pages.
+
+    `fetch` returns a StaticPage when a plain GET yields HTML whose main text
+    is at least `min_static_chars` long; anything else (errors, non-HTML,
+    bodies over `max_static_bytes`, script-rendered shells) returns None and
+    the caller falls back to the full browser. The status and headers are
+    checked before any of the body is read.
+    """
+
+    def __init__(
+        self,
+        block_resources: tuple[str, ...] = HEAVY_RESOURCES,
+        block_domains: tuple[str, ...] = AD_AND_ANALYTICS_DOMAINS,
+        http_first: bool = True,
+        http_timeout: float = 10.0,
+        min_static_chars: int = 500,
+        max_static_bytes: int = 2_000_000
+    ):
+        self.block_resources = set(block_resources)
+        self.block_domains = tuple(block_domains)
+        self.http_first = http_first
+        self.http_timeout = http_timeout
+        self.min_static_chars = min_static_chars
+        self.max_static_bytes = max_static_bytes
+        self.blocked = 0
+        self.fetched = 0
+        self.fallbacks = 0
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def blocks(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.block_resources:
+            return True
+        host = urlparse(url).hostname or ""
+        return any(host == domain or host.endswith("." + domain) for domain in self.block_domains)
+
+    async def route(self, route: Route):
+        request = route.request
+        if self.blocks(request.resource_type, request.url):
+            self.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def install(self, context: BrowserContext):
+        if self.block_resources or self.block_domains:
+            await context.route("**/*", self.route)
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=self.http_timeout,
+                headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"},
+            )
+        return self._client
+
+    async def fetch(self, url: str) -> Optional[StaticPage]:
+        if not self.http_first:
+            return None
+        try:
+            async with self._http().stream("GET", url) as response:
+                body = await self._read_html(response)
+        except httpx.HTTPError:
+            self.fallbacks += 1
+            return None
+        if body is None:
+            self.fallbacks += 1
+            return None
+
+        final_url, html = str(response.url), self._decode(response, body)
+        text = await asyncio.to_thread(main_text, html)
+        if len(text) < self.min_static_chars:
+            # A script-rendered shell: its text must not stand in for the rendered page
+            self.fallbacks += 1
+            return None
+        await asyncio.to_thread(page_text_cache.store, final_url, html, text)
+        self.fetched += 1
+        return StaticPage(final_url, html, response.status_code)
+
+    async def _read_html(self, response: httpx.Response) -> Optional[bytes]:
+        """The body of an HTML response of at most `max_static_bytes`, else None without reading the rest."""
+        if response.status_code >= 400 or "html" not in response.headers.get("content-type", ""):
+            return None
+        length = response.headers.get("content-length", "")
+        if length.isdigit() and int(length) > self.max_static_bytes:
+            return None
+        body = bytearray()
+        async for data in response.aiter_bytes():
+            body += data
+            if len(body) > self.max_static_bytes:
+                return None
+        return bytes(body)
+
+    @staticmethod
+    def _decode(response: httpx.Response, body: bytes) -> str:
+        try:
+            return body.decode(response.charset_encoding or "utf-8", errors="replace")
+        except LookupError:
+            return body.decode("utf-8", errors="replace")
+
+    def stats(self) -> dict:
+        return {
+            "http_pages": self.fetched,
+            "browser_fallbacks": self.fallbacks,
+            "blocked_requests": self.blocked,
+        }
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _names(value: Optional[str]) -> tuple[str, ...]:
+    return tuple(v.strip() for v in (value or "").split(",") if v.strip())
+
+
+navigation_profile = NavigationProfile(
+    block_resources=_names(getenv("BROWSER_BLOCK_RESOURCES", ",".join(HEAVY_RESOURCES))),
+    block_domains=AD_AND_ANALYTICS_DOMAINS + _names(getenv("BROWSER_BLOCK_DOMAINS")),
+    http_first=getenv("BROWSER_HTTP_FIRST", "true").lower() == "true",
+    http_timeout=float(getenv("BROWSER_HTTP_TIMEOUT", "10")),
+    min_static_chars=int(getenv("BROWSER_MIN_STATIC_CHARS", "500")),
+    max_static_bytes=int(getenv("BROWSER_MAX_STATIC_BYTES", "2000000")),
+)
@@ -0,0 +1,203 @@
+from os import getenv
+from typing import Optional
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel, Field
+from tools.extraction import chunk_text
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def match_query(query: str) -> Optional[str]:
+    """FTS5 query matching any of the words, each quoted so user text can't inject syntax."""
+    words = list(dict.fromkeys(w.lower() for w in _WORD.findall(query)))
+    return " OR ".join(f'"{w}"' for w in words) or None
+
+
+def thread_match(thread_id: str, match: str) -> str:
+    """Scopes a match to one thread's chunks inside the full-text query itself."""
+    quoted = thread_id.replace('"', '""')
+    return f'thread_id : "{quoted}" AND text : ({match})'
+
+
+class OutputIndex:
+    """
+    Per-thread BM25 index (SQLite FTS5) of large tool outputs.
+
+    Outputs are split into chunks and stored under a short handle; the
+    message history keeps only the handle and a snippet, and `search`
+    returns the chunks of a thread (optionally of one handle) that best
+    match a query. The thread id is an indexed column filtered inside the
+    MATCH, so a search only visits its own thread's postings. Threads
+    untouched for `ttl_seconds` are dropped.
+    """
+
+    def __init__(self, db_path: str = "db/tool_index.db", chunk_chars: int = 1000, ttl_seconds: float = 7 * 86400.0):
+        self.db_path = db_path
+        self.chunk_chars = chunk_chars
+        self.ttl_seconds = ttl_seconds
+        self.stored = 0
+        self.searches = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL;")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS outputs (
+                    handle TEXT PRIMARY KEY,
+                    thread_id TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    chunks INTEGER NOT NULL,
+                    chars INTEGER NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS outputs_thread ON outputs (thread_id, created_at)")
+            legacy = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'output_chunks' AND sql LIKE '%thread_id UNINDEXED%'"
+            ).fetchone()
+            if legacy:
+                # Chunks indexed before the thread column was: the index is a cache, so start over
+                self._conn.execute("DROP TABLE output_chunks")
+                self._conn.execute("DELETE FROM outputs")
+            self._conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS output_chunks USING fts5(
+                    text, thread_id, handle UNINDEXED, seq UNINDEXED,
+                    tokenize = 'porter unicode61'
+                )
+            """)
+            self._conn.commit()
+        return self._conn
+
+    def add(self, thread_id: str, source: str, text: str) -> tuple[str, int]:
+        """Stores `text` for the thread; returns its handle and number of chunks."""
+        handle = f"out-{uuid.uuid4().hex[:8]}"
+        chunks = chunk_text(text, self.chunk_chars)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO outputs (handle, thread_id, source, chunks, chars, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (handle, thread_id, source, len(chunks), len(text), now)
+            )
+            conn.executemany(
+                "INSERT INTO output_chunks (text, thread_id, handle, seq) VALUES (?, ?, ?, ?)",
+                [(chunk, thread_id, handle, seq) for seq, chunk in enumerate(chunks, 1)]
+            )
+            if now - self._last_prune > 3600:
+                self._prune_locked(now)
+            conn.commit()
+            self.stored += 1
+        return handle, len(chunks)
+
+    def search(self, thread_id: str, query: str, handle: Optional[str] = None, k: int = 4) -> list[tuple[str, int, str]]:
+        """Best matching (handle, chunk number, text) of the thread, by BM25."""
+        match = match_query(query)
+        with self._lock:
+            self.searches += 1
+            conn = self._connection()
+            if match is None:
+                # No words to match: the start of the output
+                rows = conn.execute(
+                    "SELECT handle, seq, text FROM output_chunks WHERE thread_id = ? AND handle = ? ORDER BY CAST(seq AS INTEGER) LIMIT ?",
+                    (thread_id, handle, k)
+                ).fetchall() if handle else []
+            elif handle:
+                rows = conn.execute(
+                    "SELECT handle, seq, text FROM output_chunks WHERE output_chunks MATCH ? AND thread_id = ? AND handle = ? ORDER BY bm25(output_chunks, 1.0, 0.0) LIMIT ?",
+                    (thread_match(thread_id, match), thread_id, handle, k)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT handle, seq, text FROM output_chunks WHERE output_chunks MATCH ? AND thread_id = ? ORDER BY bm25(output_chunks, 1.0, 0.0) LIMIT ?",
+                    (thread_match(thread_id, match), thread_id, k)
+                ).fetchall()
+        return [(h, int(seq), text) for h, seq, text in rows]
+
+    def sources(self, thread_id: str) -> list[tuple[str, str, int]]:
+        with self._lock:
+            return self._connection().execute(
+                "SELECT handle, source, chunks FROM outputs WHERE thread_id = ? ORDER BY created_at",
+                (thread_id,)
+            ).fetchall()
+
+    def delete_thread(self, thread_id: str):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM output_chunks WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM outputs WHERE thread_id = ?", (thread_id,))
+            conn.commit()
+
+    def _prune_locked(self, now: float):
+        self._last_prune = now
+        conn = self._connection()
+        stale = [row[0] for row in conn.execute(
+            "SELECT thread_id FROM outputs GROUP BY thread_id HAVING MAX(created_at) < ?",
+            (now - self.ttl_seconds,)
+        )]
+        for thread_id in stale:
+            conn.execute("DELETE FROM output_chunks WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM outputs WHERE thread_id = ?", (thread_id,))
+
+    def stats(self) -> dict:
+        with self._lock:
+            outputs, chars = self._connection().execute("SELECT COUNT(*), COALESCE(SUM(chars), 0) FROM outputs").fetchone()
+        return {"outputs": outputs, "chars": chars, "stored": self.stored, "searches": self.searches}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def format_chunks(rows: list[tuple[str, int, str]]) -> str:
+    return "\n\n".join(f"[{handle} #{seq}]\n{text}" for handle, seq, text in rows)
+
+
+def offload_stub(handle: str, chunks: int, text: str, head: int = 1000, tail: int = 200) -> str:
+    """What stays in the message history in place of an output moved to the index."""
+    snippet = text if len(text) <= head + tail else f"{text[:head]}\n…\n{text[-tail:]}"
+    return (
+        f"[Output stored as {handle}: {len(text)} chars in {chunks} chunks. "
+        f"Call lookup with a query (and handle=\"{handle}\") to read the relevant parts.]\n{snippet}"
+    )
+
+
+class LookupInput(BaseModel):
+    query: str = Field(description="Words to search for in stored tool outputs")
+    handle: Optional[str] = Field(default=None, description="Only search this stored output, e.g. 'out-1a2b3c4d'")
+
+
+def lookup_tool(thread_id: str, index: Optional[OutputIndex] = None) -> StructuredTool:
+    index = index or output_index
+
+    def lookup(query: str, handle: Optional[str] = None) -> str:
+        rows = index.search(thread_id, query, handle)
+        if rows:
+            return format_chunks(rows)
+        stored = ", ".join(f"{h} ({source})" for h, source, _ in index.sources(thread_id)[-10:])
+        return f"No stored output matches '{query}'. Stored outputs: {stored or 'none'}."
+
+    return StructuredTool.from_function(
+        func=lookup,
+        name="lookup",
+        description="Search the large tool outputs stored earlier in this conversation and return the most relevant chunks",
+        args_schema=LookupInput
+    )
+
+
+output_index = OutputIndex(
+    db_path=getenv("TOOL_INDEX_PATH", "db/tool_index.db"),
+    chunk_chars=int(getenv("TOOL_INDEX_CHUNK_CHARS", "1000")),
+    ttl_seconds=float(getenv("TOOL_INDEX_TTL", str(7 * 86400))),
+)
@@ -1,9 +1,373 @@
-from playwright.async_api import async_playwright
-from langchain_community.agent_toolkits import PlayWrightBrowserToolkit
+from os import getenv
+from typing import Optional
+from collections import OrderedDict
+from urllib.parse import urlparse
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright, TimeoutError as PlaywrightTimeoutError
+from langchain_community.tools.playwright.extract_hyperlinks import ExtractHyperlinksTool
+from langchain_core.tools import StructuredTool, ToolException
+from tools.extraction import chunk_text, page_text_cache
+from tools.fetch import NavigationProfile, StaticPage, navigation_profile
+from pydantic import BaseModel, Field, field_validator
+import asyncio
+import json
+import time
 
 
-async def playwright_tools():
-    playwright = await async_playwright().start()
-    browser = await playwright.chromium.launch(headless=False)
-    toolkit = PlayWrightBrowserToolkit.from_browser(async_browser=browser)
-    return toolkit.get_tools(), browser, playwright
+class BrowserManager:
+    """
+    Process-wide Chromium shared by all sessions.
+
+    Chromium is launched once; each session gets its own BrowserContext, with a cap
+    on live contexts (least recently used is closed first) and idle eviction.
+    Contexts load pages through the navigation profile's request interception.
+    """
+
+    def __init__(
+        self,
+        headless: bool = True,
+        max_contexts: int = 20,
+        idle_timeout: float = 600.0,
+        profile: Optional[NavigationProfile] = None
+    ):
+        self.headless = headless
+        self.max_contexts = max_contexts
+        self.idle_timeout = idle_timeout
+        self.profile = profile
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._contexts: OrderedDict[str, BrowserContext] = OrderedDict()
+        self._last_used: dict[str, float] = {}
+        self._lock = asyncio.Lock()
+        self._evictor: Optional[asyncio.Task] = None
+
+    async def start(self) -> Browser:
+        async with self._lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+                self._contexts.clear()
+                self._last_used.clear()
+            if self._evictor is None or self._evictor.done():
+                self._evictor = asyncio.create_task(self._evict_loop())
+            return self._browser
+
+    def get_context(self, session_id: str) -> Optional[BrowserContext]:
+        context = self._contexts.get(session_id)
+        if context is not None:
+            self._touch(session_id)
+        return context
+
+    async def acquire(self, session_id: str) -> BrowserContext:
+        browser = await self.start()
+        async with self._lock:
+            context = self._contexts.get(session_id)
+            if context is not None:
+                self._touch(session_id)
+                return context
+
+            await self._evict_idle_locked()
+            while len(self._contexts) >= self.max_contexts:
+                oldest = next(iter(self._contexts))
+                await self._close_locked(oldest)
+
+            context = await browser.new_context()
+            if self.profile:
+                await self.profile.install(context)
+            self._contexts[session_id] = context
+            self._touch(session_id)
+            return context
+
+    async def release(self, session_id: str):
+        async with self._lock:
+            await self._close_locked(session_id)
+
+    async def evict_idle(self) -> int:
+        async with self._lock:
+            return await self._evict_idle_locked()
+
+    async def memory_report(self) -> dict:
+        report = {
+            "browser_connected": bool(self._browser and self._browser.is_connected()),
+            "live_contexts": len(self._contexts),
+            "max_contexts": self.max_contexts,
+            "open_pages": 0,
+            "js_heap_used_bytes": 0,
+            "sessions": {},
+        }
+        for session_id, context in list(self._contexts.items()):
+            heap = 0
+            for page in context.pages:
+                heap += await self._page_heap(context, page)
+            report["open_pages"] += len(context.pages)
+            report["js_heap_used_bytes"] += heap
+            report["sessions"][session_id] = {
+                "pages": len(context.pages),
+                "js_heap_used_bytes": heap,
+                "idle_seconds": round(time.monotonic() - self._last_used.get(session_id, time.monotonic()), 1),
+            }
+        return report
+
+    async def shutdown(self):
+        if self._evictor:
+            self._evictor.cancel()
+            self._evictor = None
+        async with self._lock:
+            for session_id in list(self._contexts):
+                await self._close_locked(session_id)
+            if self._browser:
+                await self._browser.close()
+                self._browser = None
+            if self._playwright:
+                await self._playwright.stop()
+                self._playwright = None
+        if self.profile:
+            await self.profile.close()
+
+    def _touch(self, session_id: str):
+        self._contexts.move_to_end(session_id)
+        self._last_used[session_id] = time.monotonic()
+
+    async def _close_locked(self, session_id: str):
+        context = self._contexts.pop(session_id, None)
+        self._last_used.pop(session_id, None)
+        if context is not None:
+            try:
+                await context.close()
+            except Exception as e:
+                print(f"Exception closing browser context for {session_id}: {e}")
+
+    async def _evict_idle_locked(self) -> int:
+        now = time.monotonic()
+        idle = [
+            session_id for session_id, last_used in self._last_used.items()
+            if now - last_used > self.idle_timeout
+        ]
+        for session_id in idle:
+            await self._close_locked(session_id)
+        return len(idle)
+
+    async def _evict_loop(self):
+        while True:
+            await asyncio.sleep(max(self.idle_timeout / 2, 1.0))
+            await self.evict_idle()
+
+    @staticmethod
+    async def _page_heap(context: BrowserContext, page) -> int:
+        try:
+            cdp = await context.new_cdp_session(page)
+            await cdp.send("Performance.enable")
+            metrics = await cdp.send("Performance.getMetrics")
+            await cdp.detach()
+        except Exception:
+            return 0
+        return int(next((m["value"] for m in metrics["metrics"] if m["name"] == "JSHeapUsedSize"), 0))
+
+
+browser_manager = BrowserManager(
+    headless=getenv("BROWSER_HEADLESS", "true").lower() != "false",
+    max_contexts=int(getenv("BROWSER_MAX_CONTEXTS", "20")),
+    idle_timeout=float(getenv("BROWSER_IDLE_TIMEOUT", "600")),
+    profile=navigation_profile,
+)
+
+
+class SessionPages:
+    """
+    Named pages ("p1", "p2", ...) in one session's BrowserContext.
+
+    Every navigation without a handle opens its own page, so parallel
+    navigate/extract calls in one researcher turn don't race on a shared tab.
+    Calls without a handle use the most recently used page. Past `max_pages`
+    the least recently used page is closed; if the context was evicted, its
+    pages are gone and the next navigation acquires a fresh context.
+
+    A handle may hold a StaticPage fetched over HTTP; `browser_page` opens
+    it in the browser the first time a tool needs a live DOM.
+    """
+
+    def __init__(self, manager: BrowserManager, session_id: str, max_pages: int = 6):
+        self.manager = manager
+        self.session_id = session_id
+        self.max_pages = max_pages
+        self._pages: OrderedDict[str, Page | StaticPage] = OrderedDict()
+        self._opened = 0
+
+    def _prune(self):
+        for handle in [h for h, page in self._pages.items() if page.is_closed()]:
+            del self._pages[handle]
+
+    def new_handle(self) -> str:
+        self._opened += 1
+        return f"p{self._opened}"
+
+    async def put(self, handle: str, page: Page | StaticPage) -> tuple[str, Page | StaticPage]:
+        previous = self._pages.pop(handle, None)
+        if previous is not None and previous is not page:
+            await previous.close()
+        self._prune()
+        self._pages[handle] = page
+        while len(self._pages) > self.max_pages:
+            _, oldest = self._pages.popitem(last=False)
+            await oldest.close()
+        return handle, page
+
+    async def open(self, handle: Optional[str] = None) -> tuple[str, Page]:
+        # The handle is taken before awaiting, so concurrent opens never share one
+        handle = handle or self.new_handle()
+        context = await self.manager.acquire(self.session_id)
+        return await self.put(handle, await context.new_page())
+
+    async def browser_page(self, handle: Optional[str] = None) -> tuple[str, Page]:
+        handle, page = self.get(handle)
+        if isinstance(page, StaticPage):
+            context = await self.manager.acquire(self.session_id)
+            live = await context.new_page()
+            await live.goto(page.url)
+            return await self.put(handle, live)
+        return handle, page
+
+    def get(self, handle: Optional[str] = None) -> tuple[str, Page | StaticPage]:
+        self._prune()
+        if handle is None:
+            if not self._pages:
+                raise ToolException("No page is open. Call navigate_browser first.")
+            handle = next(reversed(self._pages))
+        page = self._pages.get(handle)
+        if page is None:
+            raise ToolException(
+                f"Page '{handle}' is not open (open pages: {', '.join(self._pages) or 'none'}). "
+                "Call navigate_browser to open the URL again."
+            )
+        self._pages.move_to_end(handle)
+        self.manager.get_context(self.session_id)
+        return handle, page
+
+    def describe(self) -> str:
+        self._prune()
+        return "\n".join(f"{handle}: {page.url}" for handle, page in self._pages.items()) or "No page is open."
+
+
+PAGE_FIELD = Field(default=None, description="Page handle returned by navigate_browser, e.g. 'p2'. Defaults to the most recently used page.")
+
+
+class NavigateInput(BaseModel):
+    url: str = Field(description="URL to navigate to")
+    page: Optional[str] = Field(default=None, description="Page handle to reuse. Leave empty to open the URL in a new page.")
+
+    @field_validator("url")
+    @classmethod
+    def http_only(cls, url: str) -> str:
+        if urlparse(url).scheme not in ("http", "https"):
+            raise ValueError("URL scheme must be 'http' or 'https'")
+        return url
+
+
+class PageInput(BaseModel):
+    page: Optional[str] = PAGE_FIELD
+
+
+class ClickInput(BaseModel):
+    selector: str = Field(description="CSS selector for the element to click")
+    page: Optional[str] = PAGE_FIELD
+
+
+class ExtractTextInput(BaseModel):
+    page: Optional[str] = PAGE_FIELD
+    chunk: int = Field(default=1, ge=1, description="Part of the page text to return, starting at 1")
+
+
+class HyperlinksInput(BaseModel):
+    absolute_urls: bool = Field(default=False, description="Return absolute URLs instead of relative URLs")
+    page: Optional[str] = PAGE_FIELD
+
+
+class ElementsInput(BaseModel):
+    selector: str = Field(description="CSS selector, such as '*', 'div', 'p', 'a', #id, .classname")
+    attributes: list[str] = Field(default_factory=lambda: ["innerText"], description="Set of attributes to retrieve for each element")
+    page: Optional[str] = PAGE_FIELD
+
+
+def page_tools(pages: SessionPages, chunk_chars: int = 6000) -> list[StructuredTool]:
+    """The Playwright toolkit's browser tools, addressing pages by handle instead of one current page."""
+
+    async def navigate_browser(url: str, page: Optional[str] = None) -> str:
+        handle, current = pages.get(page) if page else (pages.new_handle(), None)
+        # Static pages are read over plain HTTP; the rest load in the browser
+        static = await pages.manager.profile.fetch(url) if pages.manager.profile else None
+        if static is not None:
+            await pages.put(handle, static)
+            return f"Page {handle}: navigating to {url} returned status code {static.status}"
+        target = current if isinstance(current, Page) else (await pages.open(handle))[1]
+        response = await target.goto(url)
+        status = response.status if response else "unknown"
+        return f"Page {handle}: navigating to {url} returned status code {status}"
+
+    async def previous_webpage(page: Optional[str] = None) -> str:
+        handle, target = await pages.browser_page(page)
+        response = await target.go_back()
+        if response:
+            return f"Page {handle}: navigated back to the previous page with URL '{response.url}'. Status code {response.status}"
+        return f"Page {handle}: unable to navigate back; no previous page in the history"
+
+    async def click_element(selector: str, page: Optional[str] = None) -> str:
+        handle, target = await pages.browser_page(page)
+        try:
+            await target.click(f"{selector} >> visible=1", strict=False, timeout=1_000)
+        except PlaywrightTimeoutError:
+            return f"Page {handle}: unable to click on element '{selector}'"
+        return f"Page {handle}: clicked element '{selector}'"
+
+    async def extract_text(page: Optional[str] = None, chunk: int = 1) -> str:
+        handle, target = pages.get(page)
+        url = target.url
+        # Keyed on the page's current HTML, so rendered or clicked pages are never served stale
+        # text; HTML seen before is not parsed again, and parsing runs off the loop
+        text = await asyncio.to_thread(page_text_cache.extract, url, await target.content())
+        chunks = chunk_text(text, chunk_chars)
+        if chunk > len(chunks):
+            return f"Page {handle} ({url}) has only {len(chunks)} part(s) of text."
+        more = f"\n[Part {chunk + 1} follows: call extract_text with chunk={chunk + 1}]" if chunk < len(chunks) else ""
+        return f"Page {handle} ({url}), part {chunk}/{len(chunks)}:\n{chunks[chunk - 1]}{more}"
+
+    async def extract_hyperlinks(absolute_urls: bool = False, page: Optional[str] = None) -> str:
+        _, target = pages.get(page)
+        return ExtractHyperlinksTool.scrape_page(target, await target.content(), absolute_urls)
+
+    async def get_elements(selector: str, attributes: Optional[list[str]] = None, page: Optional[str] = None) -> str:
+        _, target = await pages.browser_page(page)
+        results = []
+        for element in await target.query_selector_all(selector):
+            result = {}
+            for attribute in attributes or ["innerText"]:
+                value = await element.inner_text() if attribute == "innerText" else await element.get_attribute(attribute)
+                if value is not None and value.strip():
+                    result[attribute] = value
+            if result:
+                results.append(result)
+        return json.dumps(results, ensure_ascii=False)
+
+    async def current_webpage(page: Optional[str] = None) -> str:
+        if page is None:
+            return pages.describe()
+        return pages.get(page)[1].url
+
+    specs = [
+        (navigate_browser, NavigateInput, "Navigate a browser to the specified URL. Opens a new page unless `page` is given and returns its handle; navigate to several URLs at once to read them in parallel."),
+        (previous_webpage, PageInput, "Navigate back to the previous page in a page's history"),
+        (click_element, ClickInput, "Click on an element with the given CSS selector"),
+        (extract_text, ExtractTextInput, "Extract the main text of a webpage (navigation, ads and scripts removed), one part at a time"),
+        (extract_hyperlinks, HyperlinksInput, "Extract all hyperlinks on a webpage"),
+        (get_elements, ElementsInput, "Retrieve elements in a webpage matching the given CSS selector"),
+        (current_webpage, PageInput, "Returns the URL of a page, or the handle and URL of every open page when no page is given"),
+    ]
+    return [
+        StructuredTool.from_function(coroutine=func, name=func.__name__, description=description, args_schema=schema, handle_tool_error=True)
+        for func, schema, description in specs
+    ]
+
+
+async def playwright_tools(session_id: str):
+    await browser_manager.acquire(session_id)
+    pages = SessionPages(browser_manager, session_id, max_pages=int(getenv("BROWSER_MAX_PAGES", "6")))
+    return page_tools(pages, chunk_chars=int(getenv("PAGE_CHUNK_CHARS", "6000")))
@@ -1,16 +1,24 @@
 from langchain_community.utilities.wikipedia import WikipediaAPIWrapper
 from langchain_community.tools.wikipedia.tool import WikipediaQueryRun
 from langchain_community.utilities import GoogleSerperAPIWrapper
+from langchain_core.tools import StructuredTool
 from langchain.agents import Tool
+from tools.cache import ToolResultCache, tool_cache
 
 
-async def search_tools():
+async def search_tools(cache: ToolResultCache = tool_cache):
     serper = GoogleSerperAPIWrapper()
     serper_tool = Tool(
         name="search",
-        func=serper.run,
+        func=cache.wrap("search", serper.run),
         description="Use this tool when you want to get the results of an online web search"
     )
     wikipedia = WikipediaAPIWrapper()
-    wikipedia_tool = WikipediaQueryRun(api_wrapper=wikipedia)
+    wikipedia_query = WikipediaQueryRun(api_wrapper=wikipedia)
+    wikipedia_tool = StructuredTool.from_function(
+        func=cache.wrap("wikipedia", wikipedia.run),
+        name=wikipedia_query.name,
+        description=wikipedia_query.description,
+        args_schema=wikipedia_query.args_schema
+    )
     return [serper_tool, wikipedia_tool]
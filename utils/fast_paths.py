@@ -0,0 +1,231 @@
+from os import getenv
+from typing import Callable, Optional
+from langchain_core.messages import AIMessage, HumanMessage
+from agents.executor import APPROVAL_REQUEST
+from schema import State
+import re
+import threading
+
+
+# Whole replies (lowercased, punctuation dropped) that answer an approval request unambiguously
+APPROVALS = {
+    "y", "yes", "yes please", "yep", "yeah", "sure", "ok", "okay", "ok go ahead", "go ahead", "yes go ahead",
+    "do it", "yes do it", "proceed", "yes proceed", "send it", "yes send it", "approve", "approved",
+    "i approve", "yes i approve", "confirm", "confirmed", "i confirm",
+}
+
+DECLINES = {
+    "n", "no", "nope", "no thanks", "no thank you", "cancel", "cancel it", "stop", "abort", "dont",
+    "do not", "dont do it", "do not do it", "no dont", "no dont do it", "dont send it", "do not send it",
+    "no dont send it", "decline", "i decline", "deny", "denied", "not approved", "i dont approve",
+}
+
+APPROVAL_FEEDBACK = "Approval required before using: "
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_reply(text: str) -> str:
+    return " ".join(_PUNCTUATION.sub("", str(text).lower().replace("’", "'").replace("'", "")).split())
+
+
+def latest_user_message(state: State) -> Optional[HumanMessage]:
+    return next((m for m in reversed(state.messages) if isinstance(m, HumanMessage)), None)
+
+
+def requested_tools(state: State) -> Optional[str]:
+    """Tools named in the executor's latest approval request."""
+    for message in reversed(state.messages):
+        if isinstance(message, AIMessage) and str(message.content).startswith(APPROVAL_REQUEST):
+            return str(message.content)[len(APPROVAL_REQUEST):]
+    return None
+
+
+def _pending_approval(state: State) -> bool:
+    return state.side_effects_requested and not state.side_effects_approved
+
+
+def _current_task(state: State) -> str:
+    subtasks = state.subtasks or []
+    return subtasks[state.next_subtask_index].task if state.next_subtask_index < len(subtasks) else "the task"
+
+
+def _single_summary(state: State) -> bool:
+    subtasks = state.subtasks or []
+    return (
+        len(subtasks) == 1
+        and subtasks[0].assigned_to == "summarizer"
+        and state.next_subtask_index >= 1
+        and bool(state.subtask_results and state.subtask_results[-1].strip())
+        and not state.side_effects_requested
+    )
+
+
+def _evaluation(feedback: str, **decisions) -> dict:
+    return {
+        "messages": [AIMessage(content=feedback)],
+        "feedback_on_work": feedback,
+        "success_criteria_met": False,
+        "user_input_needed": False,
+        "replan_needed": False,
+        **decisions,
+    }
+
+
+# Clarifier
+
+def consent_reply(state: State) -> Optional[dict]:
+    """The turn is a bare yes/no to a pending approval request."""
+    if not _pending_approval(state) or not state.messages or not isinstance(state.messages[-1], HumanMessage):
+        return None
+    reply = normalize_reply(state.messages[-1].content)
+    if reply in APPROVALS:
+        return {"user_input_needed": False, "user_side_effects_confirmed": True}
+    if reply in DECLINES:
+        return {"user_input_needed": False, "user_side_effects_confirmed": False}
+    return None
+
+
+def approval_question(state: State) -> Optional[dict]:
+    """The evaluator stopped only because the user has not approved the requested tools yet."""
+    last = state.messages[-1] if state.messages else None
+    if not (_pending_approval(state) and state.user_input_needed and isinstance(last, AIMessage)):
+        return None
+    if not str(last.content).startswith(APPROVAL_FEEDBACK):
+        return None
+    question = (
+        f"To complete \"{_current_task(state)}\" I need to use {requested_tools(state) or 'tools with side effects'}. "
+        "Do you approve? (yes/no)"
+    )
+    return {"messages": [AIMessage(content=question)], "user_input_needed": True}
+
+
+# Evaluator
+
+def approval_required(state: State) -> Optional[dict]:
+    """The executor has just asked for approval and the user has not given it."""
+    last = state.messages[-1] if state.messages else None
+    if not _pending_approval(state) or state.user_side_effects_confirmed:
+        return None
+    if not (isinstance(last, AIMessage) and str(last.content).startswith(APPROVAL_REQUEST)):
+        return None
+    return _evaluation(
+        APPROVAL_FEEDBACK + str(last.content)[len(APPROVAL_REQUEST):],
+        user_input_needed=True,
+        side_effects_approved=False
+    )
+
+
+def approval_granted(state: State) -> Optional[dict]:
+    if not _pending_approval(state) or not state.user_side_effects_confirmed:
+        return None
+    if state.next_subtask_index >= len(state.subtasks or []):
+        return None
+    return _evaluation("The user approved the requested side effects.", side_effects_approved=True)
+
+
+def approval_declined(state: State) -> Optional[dict]:
+    """The user's latest message is a bare refusal of the pending approval request."""
+    if not _pending_approval(state) or state.user_side_effects_confirmed:
+        return None
+    if not state.messages or not isinstance(state.messages[-1], HumanMessage):
+        return None
+    if normalize_reply(state.messages[-1].content) not in DECLINES:
+        return None
+    return _evaluation("The user declined the requested side effects.", side_effects_approved=False)
+
+
+def single_summary(state: State) -> Optional[dict]:
+    """A plan of one summarizer subtask: its output is the answer."""
+    if not _single_summary(state):
+        return None
+    return _evaluation("The summary answers the request.", success_criteria_met=True)
+
+
+# Finalizer
+
+def declined(state: State) -> Optional[dict]:
+    if not _pending_approval(state) or state.success_criteria_met:
+        return None
+    user_message = latest_user_message(state)
+    if user_message is None or normalize_reply(user_message.content) not in DECLINES:
+        return None
+    answer = (
+        f"Understood, I won't go ahead with \"{_current_task(state)}\". "
+        f"The actions that needed your approval ({requested_tools(state) or 'side effects'}) were not carried out."
+    )
+    return {"messages": [AIMessage(content=answer)], "final_answer": answer}
+
+
+def summary_answer(state: State) -> Optional[dict]:
+    if not state.success_criteria_met or not _single_summary(state):
+        return None
+    answer = state.subtask_results[-1]
+    return {"messages": [AIMessage(content=answer)], "final_answer": answer}
+
+
+Rule = Callable[[State], Optional[dict]]
+
+FAST_PATH_RULES: dict[str, list[tuple[str, Rule]]] = {
+    "clarifier": [("consent_reply", consent_reply), ("approval_question", approval_question)],
+    "evaluator": [
+        ("approval_required", approval_required),
+        ("approval_granted", approval_granted),
+        ("approval_declined", approval_declined),
+        ("single_summary", single_summary),
+    ],
+    "finalizer": [("declined", declined), ("summary_answer", summary_answer)],
+}
+
+
+class FastPaths:
+    """
+    Rule-based decisions taken in place of the clarifier, evaluator and
+    finalizer LLM calls when `State` alone determines them.
+
+    Each rule returns the state update the agent's prompt mandates for that
+    state, or None to leave the decision to the LLM. `enabled` restricts the
+    rules by name (None enables all of them).
+    """
+
+    def __init__(self, enabled: Optional[set[str]] = None, rules: dict[str, list[tuple[str, Rule]]] = FAST_PATH_RULES):
+        self.enabled = enabled
+        self.rules = rules
+        self.counts: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def decide(self, node: str, state: State) -> Optional[dict]:
+        for name, rule in self.rules.get(node, []):
+            if self.enabled is not None and name not in self.enabled:
+                continue
+            updates = rule(state)
+            if updates is not None:
+                self._count(f"{node}.{name}")
+                return updates
+        self._count(f"{node}.llm")
+        return None
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(sorted(self.counts.items()))
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+
+
+def _enabled_rules(value: str) -> Optional[set[str]]:
+    value = value.strip().lower()
+    if value in ("", "all", "true"):
+        return None
+    if value in ("none", "false"):
+        return set()
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+# FAST_PATHS: "all" (default), "none", or a comma-separated list of rule names
+fast_paths = FastPaths(enabled=_enabled_rules(getenv("FAST_PATHS", "all")))
@@ -0,0 +1,119 @@
+from typing import Any, Optional
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage, messages_to_dict, message_to_dict
+from langchain_core.outputs import LLMResult
+from utils.utils import prompt_date
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def request_key(messages: list[BaseMessage]) -> str:
+    text = json.dumps([[m.type, str(m.content), getattr(m, "tool_calls", None) or []] for m in messages], sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def tool_key(inputs: Any) -> str:
+    return json.dumps(inputs, sort_keys=True, default=str)
+
+
+def load_recording(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class Recorder(BaseCallbackHandler):
+    """
+    Appends every user turn, LLM request/response and tool call/result of one
+    thread to a JSONL file, tagged with the graph node that issued it.
+
+    The file is what `benchmarks/replay.py` re-runs offline.
+    """
+
+    run_inline = True
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._runs: dict[UUID, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _write(self, event: dict):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, default=str) + "\n")
+
+    def record_turn(self, content: str):
+        # Replays stamp their prompts with this date, so recorded keys still match
+        self._write({"kind": "turn", "content": content, "date": prompt_date(), "time": time.time()})
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[BaseMessage]],
+        *,
+        run_id: UUID,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> None:
+        metadata = metadata or {}
+        self._runs[run_id] = {
+            "kind": "llm",
+            "node": metadata.get("langgraph_node"),
+            "agent": metadata.get("agent"),
+            "key": request_key(messages[0]),
+            "request": messages_to_dict(messages[0]),
+            "start": time.perf_counter(),
+        }
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        event = self._runs.pop(run_id, None)
+        if event is None:
+            return
+        event["duration"] = time.perf_counter() - event.pop("start")
+        event["response"] = message_to_dict(response.generations[0][0].message)
+        self._write(event)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._runs.pop(run_id, None)
+
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        metadata: Optional[dict[str, Any]] = None,
+        inputs: Optional[dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> None:
+        self._runs[run_id] = {
+            "kind": "tool",
+            "node": (metadata or {}).get("langgraph_node"),
+            "name": (serialized or {}).get("name"),
+            "input": inputs if inputs is not None else input_str,
+            "start": time.perf_counter(),
+        }
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        event = self._runs.pop(run_id, None)
+        if event is None:
+            return
+        event["duration"] = time.perf_counter() - event.pop("start")
+        event["output"] = str(getattr(output, "content", output))
+        self._write(event)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        event = self._runs.pop(run_id, None)
+        if event is None:
+            return
+        event["duration"] = time.perf_counter() - event.pop("start")
+        event["error"] = f"{type(error).__name__}: {error}"
+        self._write(event)
+
+
+def recorder_for(thread_id: str) -> Optional[Recorder]:
+    record_dir = os.getenv("SIDEKICK_RECORD_DIR")
+    return Recorder(os.path.join(record_dir, f"{thread_id}.jsonl")) if record_dir else None
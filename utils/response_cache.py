@@ -0,0 +1,157 @@
+from os import getenv
+from typing import Any, Optional, Sequence
+from collections import OrderedDict
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache(BaseCache):
+    """
+    Exact-match chat response cache with an in-memory LRU tier in front of a
+    persistent SQLite tier.
+
+    Plugged into a chat model through its `cache` field, so the key covers the
+    serialized messages and the model's llm_string (model name, parameters and
+    the bound tool / structured-output schema). Agents stamp their prompts with
+    the date only (`prompt_date`), so identical states hit within a day.
+
+    Entries expire after `ttl_seconds` in both tiers; past `max_entries` the
+    least recently used SQLite rows are dropped.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "db/llm_cache.db",
+        max_memory_entries: int = 512,
+        ttl_seconds: float = 7 * 86400.0,
+        max_entries: int = 20000
+    ):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, tuple[float, list[Generation]]] = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL;")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    generations TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    def _remember(self, key: str, created_at: float, generations: list[Generation]):
+        self._memory[key] = (created_at, generations)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT generations, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    conn.commit()
+                self.misses += 1
+                return None
+
+            conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            generations = [loads(g, allowed_objects="core") for g in json.loads(row[0])]
+            self._remember(key, row[1], generations)
+            self.disk_hits += 1
+            return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        key = self._key(prompt, llm_string)
+        generations = list(return_val)
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, generations)
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, generations, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps([dumps(g) for g in generations]), now, now)
+            )
+            conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            # Memory hits don't refresh accessed_at, but those entries are still served from memory
+            conn.execute("""
+                DELETE FROM llm_cache WHERE rowid IN (
+                    SELECT rowid FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._connection().execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            disk_entries = self._connection().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_entries": len(self._memory),
+            "disk_entries": disk_entries,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+response_cache: Optional[ResponseCache] = (
+    ResponseCache(
+        db_path=getenv("LLM_CACHE_PATH", "db/llm_cache.db"),
+        ttl_seconds=float(getenv("LLM_CACHE_TTL", str(7 * 86400))),
+        max_entries=int(getenv("LLM_CACHE_MAX_ENTRIES", "20000")),
+    )
+    if getenv("LLM_RESPONSE_CACHE", "false").lower() == "true"
+    else None
+)
@@ -0,0 +1,75 @@
+from typing import Any, Optional
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.utils.json import parse_partial_json
+
+
+NODE_PROGRESS = {
+    "clarifier": "Reading your request…",
+    "planner": "Planning the work…",
+    "summarizer": "Summarizing the findings…",
+    "evaluator": "Checking the results…",
+    "finalizer": "Writing the answer…",
+}
+
+SUBTASK_NODES = {
+    "researcher": "Researching",
+    "research_worker": "Researching",
+    "executor": "Working on",
+    "summarizer": "Summarizing",
+    "researcher_tools": "Using {tools} for",
+    "executor_tools": "Using {tools} for",
+}
+
+
+def _field(state: Any, name: str, default: Any = None) -> Any:
+    if isinstance(state, dict):
+        return state.get(name, default)
+    return getattr(state, name, default)
+
+
+def describe_task(name: str, state: Any) -> Optional[str]:
+    """One progress line for a graph node about to run on `state`, or None for bookkeeping nodes."""
+    subtasks = _field(state, "subtasks") or []
+    index = _field(state, "active_subtask_index")
+    if index is None:
+        index = _field(state, "next_subtask_index", 0)
+
+    if name in SUBTASK_NODES and index < len(subtasks):
+        messages = _field(state, "messages") or []
+        last = messages[-1] if messages else None
+        tools = sorted({c["name"] for c in last.tool_calls}) if isinstance(last, AIMessage) else []
+        verb = SUBTASK_NODES[name].format(tools=", ".join(tools) or "tools")
+        return f"{verb} subtask {index + 1}/{len(subtasks)}: {_field(subtasks[index], 'task')}"
+    return NODE_PROGRESS.get(name)
+
+
+class AnswerStream:
+    """
+    Extracts the `final_answer` field from the finalizer's structured output
+    while its JSON is still streaming, whether it arrives as message content
+    (json_schema) or as tool call arguments (function_calling).
+    """
+
+    def __init__(self, field: str = "final_answer"):
+        self.field = field
+        self.text = ""
+        self._raw = ""
+
+    def feed(self, chunk: AIMessageChunk) -> bool:
+        """Adds a streamed chunk; True when the answer text grew."""
+        # The node's own returned messages come through as whole messages, not chunks
+        if not isinstance(chunk, AIMessageChunk):
+            return False
+        if isinstance(chunk.content, str):
+            self._raw += chunk.content
+        for call in chunk.tool_call_chunks or []:
+            self._raw += call.get("args") or ""
+        if not self._raw:
+            return False
+
+        parsed = parse_partial_json(self._raw)
+        text = parsed.get(self.field) if isinstance(parsed, dict) else None
+        if isinstance(text, str) and text != self.text:
+            self.text = text
+            return True
+        return False
@@ -0,0 +1,456 @@
+from typing import Any, Awaitable, Callable, Optional
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import getenv
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langgraph.config import get_config
+import asyncio
+import functools
+import httpx
+import inspect
+import json
+import os
+import re
+import threading
+import time
+
+
+# USD per 1M tokens: (input, cached input, output)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+}
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_METRIC_CHARS = re.compile(r"[^a-zA-Z0-9_:]")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("sidekick_current_span", default=None)
+
+
+def model_cost(model: Optional[str], input_tokens: int, cached_tokens: int, output_tokens: int) -> float:
+    # Versioned names ("gpt-4o-mini-2024-07-18") match their base model; longest prefix wins
+    matches = [name for name in MODEL_PRICES if model and model.startswith(name)]
+    if not matches:
+        return 0.0
+    input_price, cached_price, output_price = MODEL_PRICES[max(matches, key=len)]
+    return ((input_tokens - cached_tokens) * input_price + cached_tokens * cached_price + output_tokens * output_price) / 1_000_000
+
+
+class Span:
+    def __init__(self, name: str, kind: str, parent: Optional["Span"], thread_id: Optional[str], attributes: dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.thread_id = thread_id or (parent.thread_id if parent else None)
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.cost = 0.0
+        self.retries = 0
+        self.errors = 0
+
+    @property
+    def duration(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def otlp(self) -> dict:
+        attributes = {
+            **self.attributes,
+            "sidekick.kind": self.kind,
+            "sidekick.thread_id": self.thread_id,
+            "gen_ai.usage.input_tokens": self.input_tokens,
+            "gen_ai.usage.output_tokens": self.output_tokens,
+            "gen_ai.usage.cached_tokens": self.cached_tokens,
+            "sidekick.cost_usd": self.cost,
+            "sidekick.retries": self.retries,
+        }
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            # CLIENT for calls leaving the process, INTERNAL otherwise
+            "kind": 3 if self.kind in ("llm", "tool") else 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [_otlp_attribute(k, v) for k, v in attributes.items() if v is not None],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent:
+            span["parentSpanId"] = self.parent.span_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _current_thread_id() -> Optional[str]:
+    try:
+        return get_config()["configurable"].get("thread_id")
+    except RuntimeError:
+        return None
+
+
+class Tracer:
+    """
+    Records runs, graph nodes, LLM calls and tool calls as nested spans.
+
+    Token usage, cost, retries and errors of LLM and tool spans roll up into
+    their node and run spans. Finished spans are kept in a bounded buffer and
+    can be exported as OTLP/JSON; aggregates are rendered in the Prometheus
+    text format, and per-thread totals are available from `thread_report`.
+
+    Components with their own counters (caches, browser, checkpoint store)
+    register a stats provider, sampled as gauges on every scrape.
+    """
+
+    def __init__(self, service_name: str = "sidekick", max_spans: int = 4096, max_threads: int = 256, export_path: Optional[str] = None):
+        self.service_name = service_name
+        self.export_path = export_path
+        self.max_threads = max_threads
+        self._spans: deque[Span] = deque(maxlen=max_spans)
+        self._metrics: dict[tuple[str, str], dict[str, Any]] = {}
+        self._threads: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._stats: dict[tuple[str, tuple], tuple[Callable, Optional[asyncio.AbstractEventLoop]]] = {}
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, kind: str = "internal", thread_id: Optional[str] = None, **attributes) -> Span:
+        return Span(name, kind, _current_span.get(), thread_id, attributes)
+
+    def end_span(self, span: Span, error: Optional[BaseException] = None):
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+            span.errors += 1
+        parent = span.parent
+        if parent is not None:
+            parent.input_tokens += span.input_tokens
+            parent.output_tokens += span.output_tokens
+            parent.cached_tokens += span.cached_tokens
+            parent.cost += span.cost
+            parent.retries += span.retries
+            parent.errors += span.errors
+
+        with self._lock:
+            self._spans.append(span)
+            self._record(span)
+            if span.thread_id:
+                self._record_thread(span)
+
+        if parent is None and self.export_path:
+            self._export(span.trace_id)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", thread_id: Optional[str] = None, **attributes):
+        span = self.start_span(name, kind, thread_id, **attributes)
+        token = _current_span.set(span)
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span, error)
+
+    def wrap_node(self, name: str, node: Callable) -> Callable:
+        """Wraps a graph node in a span, keeping its signature so LangGraph still injects `config`."""
+        if inspect.iscoroutinefunction(node):
+            @functools.wraps(node)
+            async def traced(*args, **kwargs):
+                with self.span(name, kind="node", thread_id=_current_thread_id()):
+                    return await node(*args, **kwargs)
+        else:
+            @functools.wraps(node)
+            def traced(*args, **kwargs):
+                with self.span(name, kind="node", thread_id=_current_thread_id()):
+                    return node(*args, **kwargs)
+        return traced
+
+    def _record(self, span: Span):
+        metrics = self._metrics.setdefault((span.kind, span.name), {
+            "calls": 0,
+            "errors": 0,
+            "seconds": 0.0,
+            "buckets": [0] * len(DURATION_BUCKETS),
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cached_tokens": 0,
+            "cost": 0.0,
+            "retries": 0,
+        })
+        metrics["calls"] += 1
+        metrics["errors"] += 1 if span.error else 0
+        metrics["seconds"] += span.duration
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if span.duration <= bound:
+                metrics["buckets"][i] += 1
+        metrics["input_tokens"] += span.input_tokens
+        metrics["output_tokens"] += span.output_tokens
+        metrics["cached_tokens"] += span.cached_tokens
+        metrics["cost"] += span.cost
+        metrics["retries"] += span.retries
+
+    def _record_thread(self, span: Span):
+        thread = self._threads.get(span.thread_id)
+        if thread is None:
+            thread = self._threads[span.thread_id] = {
+                "runs": 0,
+                "seconds": 0.0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "cached_tokens": 0,
+                "cost_usd": 0.0,
+                "retries": 0,
+                "errors": 0,
+                "nodes": {},
+                "tools": {},
+            }
+        self._threads.move_to_end(span.thread_id)
+        while len(self._threads) > self.max_threads:
+            self._threads.popitem(last=False)
+
+        if span.kind == "run":
+            thread["runs"] += 1
+            thread["seconds"] += span.duration
+        elif span.kind in ("node", "tool"):
+            stats = thread["nodes" if span.kind == "node" else "tools"].setdefault(span.name, {"calls": 0, "seconds": 0.0, "errors": 0})
+            stats["calls"] += 1
+            stats["seconds"] += span.duration
+            stats["errors"] += 1 if span.error else 0
+        # Totals come from the outermost spans, which already include their children
+        if span.parent is None or span.parent.thread_id != span.thread_id:
+            thread["input_tokens"] += span.input_tokens
+            thread["output_tokens"] += span.output_tokens
+            thread["cached_tokens"] += span.cached_tokens
+            thread["cost_usd"] += span.cost
+            thread["retries"] += span.retries
+            thread["errors"] += span.errors
+
+    def thread_report(self, thread_id: str) -> Optional[dict]:
+        with self._lock:
+            thread = self._threads.get(thread_id)
+            return json.loads(json.dumps(thread)) if thread else None
+
+    def export_spans(self, trace_id: Optional[str] = None) -> dict:
+        with self._lock:
+            spans = [span.otlp() for span in self._spans if trace_id is None or span.trace_id == trace_id]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{"scope": {"name": "sidekick.tracing"}, "spans": spans}],
+            }]
+        }
+
+    def _export(self, trace_id: str):
+        try:
+            with open(self.export_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(self.export_spans(trace_id)) + "\n")
+        except OSError as e:
+            print(f"Exception exporting trace: {e}")
+
+    def register_stats(
+        self,
+        name: str,
+        provider: Callable[[], dict | Awaitable[dict]],
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        **labels: str
+    ):
+        """
+        Exports the numeric values of `provider()` as `sidekick_<name>_<key>`
+        gauges. Coroutine providers run on `loop`, the loop that owns the
+        resources they read.
+        """
+        with self._lock:
+            self._stats[(name, tuple(sorted(labels.items())))] = (provider, loop)
+
+    def unregister_stats(self, name: str, **labels: str):
+        with self._lock:
+            self._stats.pop((name, tuple(sorted(labels.items()))), None)
+
+    def _sample_stats(self) -> dict[str, list[str]]:
+        with self._lock:
+            providers = sorted(self._stats.items())
+        samples: dict[str, list[str]] = {}
+        for (name, labels), (provider, loop) in providers:
+            try:
+                if loop is not None:
+                    values = asyncio.run_coroutine_threadsafe(provider(), loop).result(timeout=5)
+                else:
+                    values = provider()
+            except Exception as e:
+                print(f"Exception collecting {name} stats: {e}")
+                continue
+            label_text = "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}" if labels else ""
+            for key, value in values.items():
+                # Strings and per-session breakdowns stay out of the exported metrics
+                if isinstance(value, (bool, int, float)):
+                    # Keys such as "evaluator.single_summary" hold characters metric names can't
+                    metric = _METRIC_CHARS.sub("_", f"sidekick_{name}_{key}")
+                    number = int(value) if isinstance(value, (bool, int)) else value
+                    samples.setdefault(metric, []).append(f"{metric}{label_text} {number}")
+        return samples
+
+    def prometheus(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = [
+            "# HELP sidekick_span_duration_seconds Wall time of runs, nodes, LLM calls and tool calls.",
+            "# TYPE sidekick_span_duration_seconds histogram",
+        ]
+        for (kind, name), m in metrics:
+            labels = f'kind="{kind}",name="{name}"'
+            for bound, count in zip(DURATION_BUCKETS, m["buckets"]):
+                lines.append(f'sidekick_span_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'sidekick_span_duration_seconds_bucket{{{labels},le="+Inf"}} {m["calls"]}')
+            lines.append(f"sidekick_span_duration_seconds_sum{{{labels}}} {m['seconds']:.6f}")
+            lines.append(f"sidekick_span_duration_seconds_count{{{labels}}} {m['calls']}")
+
+        lines += ["# HELP sidekick_span_errors_total Spans that ended with an exception.", "# TYPE sidekick_span_errors_total counter"]
+        lines += [f'sidekick_span_errors_total{{kind="{kind}",name="{name}"}} {m["errors"]}' for (kind, name), m in metrics]
+
+        # Token, cost and retry totals per node (LLM spans roll up into them)
+        nodes = [(name, m) for (kind, name), m in metrics if kind == "node"]
+        lines += ["# HELP sidekick_llm_tokens_total LLM tokens used by each graph node.", "# TYPE sidekick_llm_tokens_total counter"]
+        for name, m in nodes:
+            for token_type in ("input", "output", "cached"):
+                lines.append(f'sidekick_llm_tokens_total{{node="{name}",type="{token_type}"}} {m[f"{token_type}_tokens"]}')
+        lines += ["# HELP sidekick_llm_cost_usd_total Estimated LLM cost of each graph node.", "# TYPE sidekick_llm_cost_usd_total counter"]
+        lines += [f'sidekick_llm_cost_usd_total{{node="{name}"}} {m["cost"]:.6f}' for name, m in nodes]
+        lines += ["# HELP sidekick_llm_retries_total LLM call retries within each graph node.", "# TYPE sidekick_llm_retries_total counter"]
+        lines += [f'sidekick_llm_retries_total{{node="{name}"}} {m["retries"]}' for name, m in nodes]
+
+        for metric, samples in self._sample_stats().items():
+            lines += [f"# TYPE {metric} gauge", *samples]
+        return "\n".join(lines) + "\n"
+
+
+class TracingCallback(BaseCallbackHandler):
+    """
+    Turns chat model and tool callbacks into child spans of the current node.
+
+    Passed through the run config, so it sees every LLM and tool call of the
+    graph, including the ToolNode executions.
+    """
+
+    run_inline = True
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._spans: dict[UUID, Span] = {}
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[Any]],
+        *,
+        run_id: UUID,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> None:
+        metadata = metadata or {}
+        self._spans[run_id] = self.tracer.start_span(
+            f"llm {metadata.get('agent', 'unknown')}",
+            kind="llm",
+            **{"gen_ai.request.model": metadata.get("ls_model_name")}
+        )
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        model = (response.llm_output or {}).get("model_name")
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None)
+                if not usage:
+                    continue
+                model = model or (message.response_metadata or {}).get("model_name")
+                span.input_tokens += usage.get("input_tokens", 0)
+                span.output_tokens += usage.get("output_tokens", 0)
+                span.cached_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+        span.cost = model_cost(model, span.input_tokens, span.cached_tokens, span.output_tokens)
+        if model:
+            span.attributes["gen_ai.response.model"] = model
+        self.tracer.end_span(span)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            self.tracer.end_span(span, error)
+
+    def on_tool_start(self, serialized: dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._spans[run_id] = self.tracer.start_span((serialized or {}).get("name", "tool"), kind="tool")
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            self.tracer.end_span(span)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            self.tracer.end_span(span, error)
+
+
+async def count_llm_retry(request: httpx.Request) -> None:
+    """
+    httpx request hook for the OpenAI client, which retries failed calls itself
+    and numbers the attempts in the `x-stainless-retry-count` header. Runs in
+    the calling task, so the retry counts against the current node.
+    """
+    if request.headers.get("x-stainless-retry-count", "0") != "0":
+        span = _current_span.get()
+        if span is not None:
+            span.retries += 1
+
+
+def start_metrics_server(tracer: Tracer, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serves `/metrics` (Prometheus text format) and `/traces` (OTLP/JSON) on a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = tracer.prometheus().encode(), "text/plain; version=0.0.4"
+            elif self.path == "/traces":
+                body, content_type = json.dumps(tracer.export_spans()).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+tracer = Tracer(export_path=getenv("TRACE_EXPORT_PATH"))
+tracing_callback = TracingCallback(tracer)
@@ -1,7 +1,10 @@
-from typing import Any, get_args
+from typing import Any, Optional, get_args
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import date
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 from enum import Enum
-from schema import ResearcherToolInference, ExecutorToolInference, ResearcherToolName, ExecutorToolName, AnyToolInference
+from schema import State, ResearcherToolInference, ExecutorToolInference, ResearcherToolName, ExecutorToolName, AnyToolInference
 
 
 CAPABILITIES_MANIFEST = {
@@ -10,7 +13,7 @@ CAPABILITIES_MANIFEST = {
         "tools": [
             "search", "wikipedia", "click_element", "navigate_browser",
             "previous_webpage", "extract_text", "extract_hyperlinks",
-            "get_elements", "current_webpage"
+            "get_elements", "current_webpage", "lookup"
         ]
     },
     "executor": {
@@ -18,7 +21,7 @@ CAPABILITIES_MANIFEST = {
         "tools": [
             "Python_REPL", "copy_file", "file_delete",
             "file_search", "move_file", "read_file", "write_file",
-            "list_directory", "send_whatsapp"
+            "list_directory", "send_whatsapp", "lookup"
         ]
     },
     "summarizer": {
@@ -43,6 +46,7 @@ EXECUTOR_TOOL_SAFETY = {
     "read_file": ToolSafety.READ_ONLY,
     "file_search": ToolSafety.READ_ONLY,
     "list_directory": ToolSafety.READ_ONLY,
+    "lookup": ToolSafety.READ_ONLY,
 
     # Sandboxed but potentially harmful
     "Python_REPL": ToolSafety.SANDBOXED_COMPUTE,
@@ -62,6 +66,22 @@ RESEARCHER_TOOLS = set(get_args(ResearcherToolName))
 EXECUTOR_TOOLS = set(get_args(ExecutorToolName))
 
 
+# Tools bound to both agents (inferred as researcher calls)
+SHARED_TOOLS = RESEARCHER_TOOLS & EXECUTOR_TOOLS
+
+
+# Replays pin the date their recording was made on
+PROMPT_DATE: ContextVar[Optional[str]] = ContextVar("sidekick_prompt_date", default=None)
+
+
+def prompt_date() -> str:
+    """
+    The date stamped into agent prompts. Day resolution keeps the prompts of
+    identical states identical, which the response cache and replay keys match on.
+    """
+    return PROMPT_DATE.get() or date.today().isoformat()
+
+
 def dict_to_aimessage(d: dict[str, Any]) -> AIMessage:
     # Accepts either {"content": "...", "type":"assistant"} or {"content": "..."}
     content = d.get("content") if isinstance(d, dict) else str(d)
@@ -70,19 +90,164 @@ def dict_to_aimessage(d: dict[str, Any]) -> AIMessage:
 def truncate(text: str, max_len=500):
     return text if len(text) <= max_len else text[:max_len] + "…"
 
-def format_conversation(messages: list[Any]) -> str:
-        conversation = ""
-        for message in messages:
-            if isinstance(message, HumanMessage):
-                conversation += f"User: {message.content}\n"
-            elif isinstance(message, AIMessage):
-                text = message.content or "[Requested tool execution]"
-                conversation += f"Assistant: {text}\n"
-            elif isinstance(message, ToolMessage):
-                tool_name = message.name or "unknown_tool"
-                tool_output = truncate(message.content or "[No output]")
-                conversation += f"Tool ({tool_name}) output: {tool_output}\n"
-        return conversation
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English prose on OpenAI tokenizers
+    return len(text) // 4 + 1
+
+
+# Token budget for the conversation transcript embedded in each agent's prompt
+CONVERSATION_TOKEN_BUDGETS = {
+    "clarifier": 4000,
+    "planner": 6000,
+    "evaluator": 1500,
+}
+
+
+def _render_message(message: Any) -> tuple[str, str]:
+    """Returns the verbatim and condensed transcript lines for a message."""
+    if isinstance(message, HumanMessage):
+        return (
+            f"User: {message.content}\n",
+            f"User: {truncate(message.content, 200)}\n",
+        )
+    if isinstance(message, AIMessage):
+        text = message.content or "[Requested tool execution]"
+        return (
+            f"Assistant: {text}\n",
+            f"Assistant: {truncate(text, 200)}\n",
+        )
+    if isinstance(message, ToolMessage):
+        tool_name = message.name or "unknown_tool"
+        tool_output = truncate(message.content or "[No output]")
+        return (
+            f"Tool ({tool_name}) output: {tool_output}\n",
+            f"Tool ({tool_name}) was called.\n",
+        )
+    return "", ""
+
+
+class _RenderedThread:
+    def __init__(self):
+        self.ids: list[str] = []
+        self.lines: list[str] = []
+        self.tokens: list[int] = []
+        self.condensed: list[str] = []
+        self.condensed_tokens: list[int] = []
+
+
+class ConversationRenderer:
+    """
+    Incremental transcript renderer.
+
+    Rendered lines are cached per thread (keyed by the id of the thread's first
+    message) and reused while the messages they render are still the thread's
+    leading ones, id for id, so each call only renders messages appended since
+    the last one.
+    With a token budget, the latest messages are kept verbatim (always at
+    least the last one, cut to the budget if it alone exceeds it) and older
+    messages are condensed line by line: user and assistant messages
+    truncated to 200 characters, tool outputs reduced to the tool's name.
+    Older messages that don't fit even condensed are counted, not shown.
+    """
+
+    def __init__(self, max_threads: int = 256):
+        self.max_threads = max_threads
+        self._threads: OrderedDict[str, _RenderedThread] = OrderedDict()
+
+    def render(
+        self,
+        messages: list[Any],
+        token_budget: Optional[int] = None,
+        tail: Optional[int] = None
+    ) -> str:
+        thread = self._sync(messages)
+        first = max(len(thread.lines) - tail, 0) if tail is not None else 0
+
+        if token_budget is None or sum(thread.tokens[first:]) <= token_budget:
+            return "".join(thread.lines[first:])
+
+        # Keep the newest messages verbatim within ~3/4 of the budget
+        verbatim_budget = token_budget * 3 // 4
+        boundary = len(thread.lines)
+        used = 0
+        while boundary > first and used + thread.tokens[boundary - 1] <= verbatim_budget:
+            boundary -= 1
+            used += thread.tokens[boundary]
+
+        recent = "".join(thread.lines[boundary:])
+        if boundary == len(thread.lines) and boundary > first:
+            # The newest message alone exceeds the verbatim share: keep it anyway, cut to fit
+            boundary -= 1
+            recent = truncate(thread.lines[boundary].rstrip("\n"), verbatim_budget * 4) + "\n"
+            used = estimate_tokens(recent)
+
+        # Condense the older ones into whatever budget remains, newest first
+        summary_budget = token_budget - used
+        start = boundary
+        summary_used = 0
+        while start > first and summary_used + thread.condensed_tokens[start - 1] <= summary_budget:
+            start -= 1
+            summary_used += thread.condensed_tokens[start]
+
+        summary = "".join(thread.condensed[start:boundary])
+        if start > first:
+            summary = f"[{start - first} earlier messages omitted]\n" + summary
+
+        return (
+            "[Earlier conversation, condensed]\n" + summary
+            + "[Recent conversation]\n" + recent
+        )
+
+    def _sync(self, messages: list[Any]) -> _RenderedThread:
+        key = getattr(messages[0], "id", None) if messages else None
+        thread = self._threads.get(key) if key else None
+
+        rendered = len(thread.ids) if thread else 0
+        # Comparing every id, not just the last, catches removed or replaced messages before it
+        if (
+            thread is None
+            or rendered > len(messages)
+            or [getattr(message, "id", None) for message in messages[:rendered]] != thread.ids
+        ):
+            thread = _RenderedThread()
+            rendered = 0
+
+        for message in messages[rendered:]:
+            line, condensed = _render_message(message)
+            thread.ids.append(getattr(message, "id", None))
+            thread.lines.append(line)
+            thread.tokens.append(estimate_tokens(line) if line else 0)
+            thread.condensed.append(condensed)
+            thread.condensed_tokens.append(estimate_tokens(condensed) if condensed else 0)
+
+        if key:
+            self._threads[key] = thread
+            self._threads.move_to_end(key)
+            while len(self._threads) > self.max_threads:
+                self._threads.popitem(last=False)
+
+        return thread
+
+
+conversation_renderer = ConversationRenderer()
+
+
+def format_conversation(
+    messages: list[Any],
+    token_budget: Optional[int] = None,
+    tail: Optional[int] = None
+) -> str:
+    return conversation_renderer.render(messages, token_budget, tail)
+
+def subtask_messages(state: State) -> list[AIMessage | ToolMessage]:
+    """
+    AI and tool messages produced since the current subtask started, i.e. the
+    agent's own tool loop, without tool output from earlier subtasks or turns.
+    """
+    return [
+        m for m in state.messages[state.subtask_message_start:]
+        if isinstance(m, (AIMessage, ToolMessage))
+    ]
 
 def infer_tool_calls(message: AIMessage) -> list[AnyToolInference]:
     """